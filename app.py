@@ -9,16 +9,21 @@ sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 import streamlit as st
 import os
 import time
+import hashlib
 from loguru import logger
 import json # Import the json library
+import orjson # Fast parsing of LLM result payloads
 import pandas as pd # Add pandas import
 import re # Import the 're' module for regular expressions
 import asyncio # Add asyncio import
 import subprocess # To run playwright install
 from typing import List
 from langchain.docstore.document import Document
-from concurrent.futures import ThreadPoolExecutor
+from langchain.vectorstores.base import VectorStoreRetriever
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import partial
+from itertools import cycle
+from html import escape
 
 # --- Install Playwright browsers needed by crawl4ai --- 
 # This should run on startup in the Streamlit Cloud environment
@@ -55,114 +60,255 @@ install_playwright_browsers() # Run the installation check on script start
 
 # Import project modules
 import config
+import diskcache
 from pdf_processor import process_uploaded_pdfs, process_pdfs_in_background
 from vector_store import (
     get_embedding_function,
     setup_vector_store,
-    load_existing_vector_store
+    collection_name_for,
+    load_existing_vector_store,
+    persisted_store_exists
 )
 # Updated imports from llm_interface
 from llm_interface import (
     initialize_llm,
+    EXTRACTION_PROMPTS_VERSION, # Part of the disk-cache keys
     create_pdf_extraction_chain, # Use PDF chain func
     create_web_extraction_chain, # Use Web chain func
-    _invoke_chain_and_process, # Use the helper directly
-    scrape_website_table_html
-)
-# Import the prompts
-from extraction_prompts import (
-    # Material Properties
-    MATERIAL_PROMPT,
-    MATERIAL_NAME_PROMPT,
-    # Physical / Mechanical Attributes
-    PULL_TO_SEAT_PROMPT,
-    GENDER_PROMPT,
-    HEIGHT_MM_PROMPT,
-    LENGTH_MM_PROMPT,
-    WIDTH_MM_PROMPT,
-    NUMBER_OF_CAVITIES_PROMPT,
-    NUMBER_OF_ROWS_PROMPT,
-    MECHANICAL_CODING_PROMPT,
-    COLOUR_PROMPT,
-    COLOUR_CODING_PROMPT,
-    # Sealing & Environmental
-    WORKING_TEMPERATURE_PROMPT,
-    HOUSING_SEAL_PROMPT,
-    WIRE_SEAL_PROMPT,
-    SEALING_PROMPT,
-    SEALING_CLASS_PROMPT,
-    # Terminals & Connections
-    CONTACT_SYSTEMS_PROMPT,
-    TERMINAL_POSITION_ASSURANCE_PROMPT,
-    CONNECTOR_POSITION_ASSURANCE_PROMPT,
-    CLOSED_CAVITIES_PROMPT,
-    # Assembly & Type
-    PRE_ASSEMBLED_PROMPT,
-    CONNECTOR_TYPE_PROMPT,
-    SET_KIT_PROMPT,
-    # Specialized Attributes
-    HV_QUALIFIED_PROMPT
-)
-# Import the NEW web prompts
-from extraction_prompts_web import (
-    # Material Properties
-    MATERIAL_FILLING_WEB_PROMPT,
-    MATERIAL_NAME_WEB_PROMPT,
-    # Physical / Mechanical Attributes
-    PULL_TO_SEAT_WEB_PROMPT,
-    GENDER_WEB_PROMPT,
-    HEIGHT_MM_WEB_PROMPT,
-    LENGTH_MM_WEB_PROMPT,
-    WIDTH_MM_WEB_PROMPT,
-    NUMBER_OF_CAVITIES_WEB_PROMPT,
-    NUMBER_OF_ROWS_WEB_PROMPT,
-    MECHANICAL_CODING_WEB_PROMPT,
-    COLOUR_WEB_PROMPT,
-    COLOUR_CODING_WEB_PROMPT,
-    # Sealing & Environmental
-    MAX_WORKING_TEMPERATURE_WEB_PROMPT,
-    MIN_WORKING_TEMPERATURE_WEB_PROMPT,
-    HOUSING_SEAL_WEB_PROMPT,
-    WIRE_SEAL_WEB_PROMPT,
-    SEALING_WEB_PROMPT,
-    SEALING_CLASS_WEB_PROMPT,
-    # Terminals & Connections
-    CONTACT_SYSTEMS_WEB_PROMPT,
-    TERMINAL_POSITION_ASSURANCE_WEB_PROMPT,
-    CONNECTOR_POSITION_ASSURANCE_WEB_PROMPT,
-    CLOSED_CAVITIES_WEB_PROMPT,
-    # Assembly & Type
-    PRE_ASSEMBLED_WEB_PROMPT,
-    CONNECTOR_TYPE_WEB_PROMPT,
-    SET_KIT_WEB_PROMPT,
-    # Specialized Attributes
-    HV_QUALIFIED_WEB_PROMPT
+    create_pdf_grouped_extraction_chain, # All PDF-stage attributes in one request
+    create_web_grouped_extraction_chain, # All web-stage attributes in one request
+    invoke_chain_concurrently, # Runs one stage for all attributes concurrently
+    invoke_grouped_extraction,
+    partial_answer_value, # Value of an attribute from a still-streaming response
+    prefetch_pdf_context, # One retrieval shared by all PDF-stage attributes
+    retrieve_pdf_contexts, # Per-attribute retrieval with batched query embedding
+    scrape_website_table_html,
+    scrape_website_tables_html # Several part numbers in one browser
 )
+from result_parsing import Status, parse_result
+from rule_extractors import extract_with_rules
 
 async def process_web_urls(urls: List[str]) -> List[Document]:
     """Process web URLs and return documents."""
     web_docs = []
-    for url in urls:
-        try:
-            # Scrape the website table HTML
-            table_html = await scrape_website_table_html(url)
-            if table_html:
-                # Create a document from the scraped HTML
-                doc = Document(
-                    page_content=table_html,
-                    metadata={
-                        'source': f'web_{url}',
-                        'type': 'web_scrape'
-                    }
-                )
-                web_docs.append(doc)
-                logger.info(f"Successfully scraped data from {url}")
-            else:
-                logger.warning(f"No data found for {url}")
-        except Exception as e:
-            logger.error(f"Error processing URL {url}: {e}")
+    try:
+        # All part numbers are scraped concurrently in one browser
+        tables_by_url = await scrape_website_tables_html(urls)
+    except Exception as e:
+        logger.error(f"Error processing URLs {urls}: {e}")
+        return web_docs
+    for url, table_html in tables_by_url.items():
+        if table_html:
+            # Create a document from the scraped HTML
+            doc = Document(
+                page_content=table_html,
+                metadata={
+                    'source': f'web_{url}',
+                    'type': 'web_scrape'
+                }
+            )
+            web_docs.append(doc)
+            logger.info(f"Successfully scraped data from {url}")
+        else:
+            logger.warning(f"No data found for {url}")
     return web_docs
 
+def stream_preview(partial_response: str, max_chars: int = 160) -> str:
+    """Returns the tail of a streaming LLM response, whitespace-collapsed, for a one-line status caption."""
+    return " ".join(partial_response[-max_chars:].split())
+
+def is_error_payload(json_result_str: str) -> bool:
+    """True if a chain result is the {"error": ...} payload produced on failures (never cached)."""
+    try:
+        parsed = orjson.loads(json_result_str)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(parsed, dict) and "error" in parsed
+
+# Badge with the extracted value, shown in an attribute's status slot once it finishes.
+# The value is LLM output, so it is always HTML-escaped before being formatted in.
+_BADGE_TEMPLATE = (
+    '<span style="background-color:{c};color:white;padding:3px 8px;border-radius:5px;font-size:.9em;'
+    'word-wrap:break-word;display:inline-block;max-width:100%">{v}</span>'
+)
+COLOR_BY_STATUS = {
+    Status.OK: "#28a745", # Green
+    Status.NOT_FOUND: "#ffc107", # Amber
+    Status.RATE_LIMIT: "#fd7e14", # Orange
+    Status.ERROR: "#dc3545", # Red
+}
+
+# Native <details> instead of st.expander + st.code: the whole card is one markdown element (one delta per update)
+_RAW_OUTPUT_TEMPLATE = (
+    '<details><summary><small>Show Raw Output</small></summary>'
+    '<pre style="white-space:pre-wrap;font-size:.8em;margin:0">{raw}</pre></details>'
+)
+
+def show_done_status(slot, status_text: str, attribute_key: str, json_result_str: str):
+    """
+    Replaces a status slot's content with the finished card: `status_text`, a badge holding the
+    extracted value (or error, colored by status) and a collapsed <details> block with the raw chain output.
+    """
+    result = parse_result(json_result_str or "", attribute_key)
+    # Newlines as entities keep the raw output inside one HTML block for the markdown parser
+    raw = escape(json_result_str or "").replace("\n", "&#10;")
+    slot.markdown(
+        f"<small>{escape(status_text)}</small> "
+        + _BADGE_TEMPLATE.format(c=COLOR_BY_STATUS[result.status], v=escape(result.value))
+        + _RAW_OUTPUT_TEMPLATE.format(raw=raw),
+        unsafe_allow_html=True
+    )
+
+_BADGE_COLOR_STREAMING = "#6c757d" # Grey: value still being generated
+
+def show_streaming_status(slot, stage_label: str, attribute_key: str, partial_response: str):
+    """Shows a streaming call's progress: the value as it crystallizes in the JSON, else the response tail."""
+    value = partial_answer_value(partial_response, attribute_key)
+    if value is None:
+        slot.caption(f"⏳ {stage_label}: {attribute_key} … {stream_preview(partial_response)}")
+    else:
+        slot.markdown(
+            f"<small>{escape(f'⏳ {stage_label}: {attribute_key}')}</small> " + _BADGE_TEMPLATE.format(c=_BADGE_COLOR_STREAMING, v=escape(value)),
+            unsafe_allow_html=True
+        )
+
+@st.cache_resource
+def get_extraction_disk_cache():
+    """Disk-backed (LRU, size-capped) store of raw extraction outputs shared by all sessions."""
+    return diskcache.Cache(
+        config.EXTRACTION_CACHE_DIR,
+        size_limit=config.EXTRACTION_CACHE_SIZE_LIMIT,
+        eviction_policy="least-recently-used",
+    )
+
+def disk_cache_key(cache_key) -> str:
+    """
+    Stable digest of an in-session cache key (which embeds the full prompt inputs) for the disk cache.
+    The model name and prompt-template version are mixed in so switching LLM_MODEL_NAME or editing
+    a chain's prompt never serves answers produced by the old setup.
+    """
+    return hashlib.sha256(repr((config.LLM_MODEL_NAME, EXTRACTION_PROMPTS_VERSION, cache_key)).encode()).hexdigest()
+
+def run_extraction_stage(chain, inputs_by_attribute, stage_label, slots, loop, source_key, persist=True, llm_overrides_by_attribute=None):
+    """
+    Runs one extraction stage for all attributes concurrently, showing per-attribute status in `slots`
+    (attribute key -> st.empty placeholder, created once so both stages update the same card).
+    Raw outputs are memoized in session state by (stage, source_key, input), so reruns over the
+    same documents skip the LLM; the cache is cleared when new documents are processed.
+    With `persist` (source_key identifies the content, e.g. PDF hashes), outputs are also kept in the
+    disk cache so any session extracting from the same documents gets them without LLM calls.
+    `llm_overrides_by_attribute` sets per-attribute LLM settings (output token cap, model); they are part of the cache key.
+
+    Returns:
+        A dict of attribute key -> (json_result_str, run_time_seconds).
+    """
+    cache = st.session_state.extraction_cache
+    disk_cache = get_extraction_disk_cache() if persist and config.EXTRACTION_CACHE_DIR else None
+    results = {}
+    pending_inputs = {}
+    cache_keys = {}
+    for attribute_key, input_data in inputs_by_attribute.items():
+        llm_overrides = (llm_overrides_by_attribute or {}).get(attribute_key, {})
+        cache_key = (stage_label, source_key, tuple(sorted(input_data.items())), tuple(sorted(llm_overrides.items())))
+        if cache_key not in cache and disk_cache is not None:
+            disk_value = disk_cache.get(disk_cache_key(cache_key))
+            if disk_value is not None:
+                cache[cache_key] = disk_value
+        if cache_key in cache:
+            results[attribute_key] = (cache[cache_key], 0.0)
+            show_done_status(slots[attribute_key], f"✔️ {stage_label}: {attribute_key} (cached)", attribute_key, cache[cache_key])
+        else:
+            cache_keys[attribute_key] = cache_key
+            pending_inputs[attribute_key] = input_data
+            slots[attribute_key].caption(f"⏳ {stage_label}: Extracting {attribute_key}...")
+
+    if pending_inputs:
+        logger.info(f"{stage_label}: {len(results)} cached, {len(pending_inputs)} to extract.")
+        # One progress bar for the whole stage, bumped as each attribute finishes
+        total = len(pending_inputs)
+        progress = st.progress(0.0, text=f"{stage_label}: 0 / {total} extracted")
+        done = 0
+
+        def on_result(key, json_result_str, run_time):
+            nonlocal done
+            done += 1
+            progress.progress(done / total, text=f"{stage_label}: {done} / {total} extracted ({key})")
+            show_done_status(slots[key], f"✔️ {stage_label}: {key} ({run_time:.2f}s)", key, json_result_str)
+            # Cache each answer as it lands, so a rerun that interrupts the stage keeps what was already shown
+            results[key] = (json_result_str, run_time)
+            if json_result_str and not is_error_payload(json_result_str):
+                cache[cache_keys[key]] = json_result_str
+                if disk_cache is not None:
+                    disk_cache.set(disk_cache_key(cache_keys[key]), json_result_str, expire=config.EXTRACTION_CACHE_TTL_SECONDS)
+
+        loop.run_until_complete(
+            invoke_chain_concurrently(
+                chain, pending_inputs, stage_label,
+                on_result=on_result,
+                on_progress=lambda key, partial: show_streaming_status(slots[key], stage_label, key, partial),
+                llm_overrides_by_attribute=llm_overrides_by_attribute
+            )
+        )
+        progress.empty()
+    return results
+
+def run_grouped_extraction(chain, inputs_by_attribute, stage_label, slots, loop, source_key, persist=True):
+    """
+    Asks for all of a stage's attributes in one LLM call; the inputs share everything except
+    attribute_key / extraction_instructions (the shared context or scraped data).
+    The answer is memoized in session state (and, with `persist`, the disk cache) like run_extraction_stage's outputs.
+
+    Returns:
+        A dict of attribute key -> (json_result_str, run_time_seconds) for the attributes the call
+        answered; the others are left for the per-attribute run.
+    """
+    first_input = next(iter(inputs_by_attribute.values()))
+    shared_inputs = {name: value for name, value in first_input.items() if name not in ("attribute_key", "extraction_instructions")}
+    instructions_by_attribute = {key: input_data["extraction_instructions"] for key, input_data in inputs_by_attribute.items()}
+    cache_key = (
+        stage_label, source_key, config.GROUPED_LLM_MODEL_NAME, config.GROUPED_RESPONSE_FORMAT,
+        tuple(sorted(shared_inputs.items())), tuple(sorted(instructions_by_attribute.items()))
+    )
+    cache = st.session_state.extraction_cache
+    disk_cache = get_extraction_disk_cache() if persist and config.EXTRACTION_CACHE_DIR else None
+    if cache_key not in cache and disk_cache is not None:
+        disk_value = disk_cache.get(disk_cache_key(cache_key))
+        if disk_value is not None:
+            cache[cache_key] = disk_value
+    run_time = 0.0
+    if cache_key in cache:
+        answered = cache[cache_key]
+    else:
+        with st.spinner(f"{stage_label}: Extracting {len(inputs_by_attribute)} attributes in one request..."):
+            start_ns = time.perf_counter_ns()
+            answered = loop.run_until_complete(invoke_grouped_extraction(chain, shared_inputs, instructions_by_attribute))
+            run_time = (time.perf_counter_ns() - start_ns) / 1e9
+        if answered:
+            cache[cache_key] = answered
+            if disk_cache is not None:
+                disk_cache.set(disk_cache_key(cache_key), answered, expire=config.EXTRACTION_CACHE_TTL_SECONDS)
+
+    results = {}
+    for attribute_key, value in answered.items():
+        json_result_str = orjson.dumps({attribute_key: value}).decode()
+        results[attribute_key] = (json_result_str, run_time)
+        show_done_status(slots[attribute_key], f"✔️ {stage_label}: {attribute_key}", attribute_key, json_result_str)
+    return results
+
+def run_rule_extraction(text, attribute_keys, stage_label, slots):
+    """
+    Answers the attributes whose regex rule matches `text` unambiguously, skipping their LLM calls.
+
+    Returns:
+        A dict of attribute key -> (json_result_str, run_time_seconds) for the rule hits only.
+    """
+    results = {}
+    for attribute_key, value in extract_with_rules(text, attribute_keys).items():
+        json_result_str = orjson.dumps({attribute_key: value}).decode()
+        results[attribute_key] = (json_result_str, 0.0)
+        show_done_status(slots[attribute_key], f"✔️ {stage_label}: {attribute_key}", attribute_key, json_result_str)
+    return results
+
 # --- Streamlit Page Configuration ---
 st.set_page_config(
     page_title="PDF Auto-Extraction with Groq", # Updated title
@@ -172,6 +318,15 @@ st.set_page_config(
 
 # --- Logging Configuration ---
 # Configure Loguru logger (can be more flexible than standard logging)
+# The script reruns on every interaction, so the sink is swapped once per process (cached resource).
+# enqueue=True hands formatting/writes to Loguru's background worker instead of the Streamlit thread.
+@st.cache_resource
+def configure_logging():
+    logger.remove()
+    logger.add(sys.stderr, level=config.LOG_LEVEL, enqueue=True, backtrace=False, diagnose=False)
+    return True
+
+configure_logging()
 # logger.add("logs/app_{time}.log", rotation="10 MB", level="INFO") # Example: Keep file logging if desired
 # Toasts are disabled as per previous request
 # Errors will still be shown via st.error where used explicitly
@@ -202,6 +357,10 @@ if 'scraped_table_html_cache' not in st.session_state:
     st.session_state.scraped_table_html_cache = None # Cache for scraped HTML for the current part number
 if 'current_part_number_scraped' not in st.session_state:
     st.session_state.current_part_number_scraped = None # Track which part number was last scraped for
+if 'processed_file_hashes' not in st.session_state:
+    st.session_state.processed_file_hashes = [] # SHA-256 of the processed PDFs' bytes (empty for data loaded from disk)
+if 'extraction_cache' not in st.session_state:
+    st.session_state.extraction_cache = {} # Raw chain outputs keyed by (stage, source, input); see run_extraction_stage
 
 # Add new session state for background tasks
 if 'pdf_processing_task' not in st.session_state:
@@ -227,19 +386,48 @@ def initialize_llm_cached():
     # logger.success("LLM initialized successfully.") # Log after successful call if needed
     return llm_instance
 
+# Build the PDF chain once per retriever object instead of on every call site/rerun.
+# Every processing run creates a new retriever, and a cached chain keeps its retriever (and the Chroma
+# store behind it) alive, so only the most recent ones are kept.
+@st.cache_resource(hash_funcs={VectorStoreRetriever: id}, max_entries=8)
+def get_pdf_extraction_chain(retriever, _llm):
+    return create_pdf_extraction_chain(retriever, _llm)
+
+@st.cache_resource
+def get_web_extraction_chain(_llm):
+    return create_web_extraction_chain(_llm)
+
+@st.cache_resource
+def get_pdf_grouped_extraction_chain(_llm):
+    return create_pdf_grouped_extraction_chain(_llm)
+
+@st.cache_resource
+def get_web_grouped_extraction_chain(_llm):
+    return create_web_grouped_extraction_chain(_llm)
+
+def load_embedding_function():
+    """
+    Initializes the embedding model on demand (cached, so only the first call pays for it).
+    Returns:
+        The embedding function, or None if initialization failed (the error is shown in the UI).
+    """
+    try:
+        logger.info("Attempting to initialize embedding function...")
+        embeddings = initialize_embeddings()
+        if embeddings:
+             logger.success("Embedding function initialized successfully.")
+        return embeddings
+    except Exception as e:
+        logger.error(f"Failed to initialize embeddings: {e}", exc_info=True)
+        st.error(f"Fatal Error: Could not initialize embedding model. Error: {e}")
+        return None
+
 # --- Wrap the cached function call in try-except ---
 embedding_function = None
 llm = None
 
-try:
-    logger.info("Attempting to initialize embedding function...")
-    embedding_function = initialize_embeddings()
-    if embedding_function:
-         logger.success("Embedding function initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize embeddings: {e}", exc_info=True)
-    st.error(f"Fatal Error: Could not initialize embedding model. Error: {e}")
-    st.stop()
+# The embedding model is initialized in the background job that loads a persisted store (see below),
+# or lazily when "Process Uploaded Documents" is clicked; never before the page has rendered.
 
 try:
     logger.info("Attempting to initialize LLM...")
@@ -252,10 +440,12 @@ except Exception as e:
      st.stop()
 
 # --- Check if initializations failed ---
-if embedding_function is None or llm is None:
-     if not st.exception: # If st.stop() wasn't called already
-        st.error("Core components (Embeddings or LLM) failed to initialize. Cannot continue.")
-     st.stop()
+# Failures that raised have already shown their error and stopped; this covers a None result.
+# (Embeddings are initialized lazily, so only the LLM is required here.)
+init_ok = llm is not None
+if not init_ok:
+    st.error("Core components (LLM) failed to initialize. Cannot continue.")
+    st.stop()
 
 
 # --- Load existing vector store or process uploads ---
@@ -270,17 +460,40 @@ def reset_evaluation_state():
     if 'gt_editor' in st.session_state:
         del st.session_state['gt_editor']
 
+# Load the existing vector store in a background thread so the page renders immediately.
+# The worker only initializes embeddings and opens the store; session state is updated here, on the script thread.
+@st.cache_resource
+def get_background_executor():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-store-load")
+
+def load_existing_retriever():
+    """Background job: initializes the embedding model (cached for later uploads too), then opens the persisted store."""
+    return load_existing_vector_store(initialize_embeddings())
+
+if 'retriever_load_future' not in st.session_state: # First run of this session
+    st.session_state.retriever_load_future = None
+    if st.session_state.retriever is None and persisted_store_exists():
+        logger.info("Starting background load of existing vector store...")
+        st.session_state.retriever_load_future = get_background_executor().submit(load_existing_retriever)
+
 # Try loading existing vector store and create BOTH extraction chains
-if st.session_state.retriever is None and config.CHROMA_SETTINGS.is_persistent and embedding_function:
-    logger.info("Attempting to load existing vector store...")
-    st.session_state.retriever = load_existing_vector_store(embedding_function)
-    if st.session_state.retriever:
+retriever_load_future = st.session_state.retriever_load_future
+if retriever_load_future is not None and retriever_load_future.done():
+    st.session_state.retriever_load_future = None
+    try:
+        loaded_retriever = retriever_load_future.result()
+    except Exception as e:
+        logger.error(f"Background load of existing vector store failed: {e}", exc_info=True)
+        loaded_retriever = None
+    if loaded_retriever and st.session_state.retriever is None:
+        st.session_state.retriever = loaded_retriever
         logger.success("Successfully loaded retriever from persistent storage.")
         st.session_state.processed_files = ["Existing data loaded from disk"]
+        st.session_state.processed_file_hashes = []
         # --- Create BOTH Extraction Chains --- 
         logger.info("Creating extraction chains from loaded retriever...")
-        st.session_state.pdf_chain = create_pdf_extraction_chain(st.session_state.retriever, llm)
-        st.session_state.web_chain = create_web_extraction_chain(llm)
+        st.session_state.pdf_chain = get_pdf_extraction_chain(st.session_state.retriever, llm)
+        st.session_state.web_chain = get_web_extraction_chain(llm)
         if not st.session_state.pdf_chain or not st.session_state.web_chain:
             st.warning("Failed to create one or both extraction chains from loaded retriever.")
         # ------------------------------------
@@ -317,18 +530,24 @@ with st.sidebar:
     process_button = st.button("Process Uploaded Documents", key="process_button", type="primary")
 
     if process_button and uploaded_files:
+        if embedding_function is None:
+            embedding_function = load_embedding_function()
         if not embedding_function or not llm:
              st.error("Core components (Embeddings or LLM) failed to initialize earlier. Cannot process documents.")
         else:
             # Reset state including evaluation and the extraction flag
+            st.session_state.retriever_load_future = None # Newly processed documents win over a pending background load
             st.session_state.retriever = None
             # Reset BOTH chains
             st.session_state.pdf_chain = None
             st.session_state.web_chain = None
             st.session_state.processed_files = []
+            st.session_state.processed_file_hashes = []
+            st.session_state.extraction_cache = {} # Cached outputs belong to the previous documents
             reset_evaluation_state() # Reset evaluation results AND extraction_performed flag
 
             filenames = [f.name for f in uploaded_files]
+            file_hashes = sorted(hashlib.sha256(f.getvalue()).hexdigest() for f in uploaded_files) # Content keys for the disk cache
             logger.info(f"Starting processing for {len(filenames)} files: {', '.join(filenames)}")
             
             # Initialize processed_docs
@@ -337,7 +556,7 @@ with st.sidebar:
             # --- PDF Processing ---
             with st.spinner("Processing PDFs... Loading, cleaning, splitting..."):
                 try:
-                    start_time = time.time()
+                    start_ns = time.perf_counter_ns()
                     temp_dir = os.path.join(os.getcwd(), "temp_pdf_files")
                     
                     # Create event loop for async processing
@@ -380,8 +599,8 @@ with st.sidebar:
                     # Run the parallel processing
                     processed_docs = loop.run_until_complete(process_all())
                     
-                    processing_time = time.time() - start_time
-                    logger.info(f"Processing took {processing_time:.2f} seconds.")
+                    processing_ms = (time.perf_counter_ns() - start_ns) / 1e6
+                    logger.info(f"Processing took {processing_ms:.0f} ms.")
                 except Exception as e:
                     logger.error(f"Failed during processing phase: {e}", exc_info=True)
                     st.error(f"Error during processing: {e}")
@@ -392,18 +611,23 @@ with st.sidebar:
                 logger.info(f"Generated {len(processed_docs)} document chunks.")
                 with st.spinner("Indexing documents in vector store..."):
                     try:
-                        start_time = time.time()
-                        st.session_state.retriever = setup_vector_store(processed_docs, embedding_function)
-                        indexing_time = time.time() - start_time
-                        logger.info(f"Vector store setup took {indexing_time:.2f} seconds.")
+                        start_ns = time.perf_counter_ns()
+                        # A collection per set of PDFs: other sessions keep querying their own index
+                        st.session_state.retriever = setup_vector_store(
+                            processed_docs, embedding_function, batch_size=config.VECTOR_STORE_BATCH_SIZE,
+                            collection_name=collection_name_for(file_hashes)
+                        )
+                        indexing_ms = (time.perf_counter_ns() - start_ns) / 1e6
+                        logger.info(f"Vector store setup took {indexing_ms:.0f} ms.")
 
                         if st.session_state.retriever:
                             st.session_state.processed_files = filenames # Update list
+                            st.session_state.processed_file_hashes = file_hashes
                             logger.success("Vector store setup complete. Retriever is ready.")
                             # --- Create BOTH Extraction Chains --- 
                             with st.spinner("Preparing extraction engines..."):
-                                 st.session_state.pdf_chain = create_pdf_extraction_chain(st.session_state.retriever, llm)
-                                 st.session_state.web_chain = create_web_extraction_chain(llm)
+                                 st.session_state.pdf_chain = get_pdf_extraction_chain(st.session_state.retriever, llm)
+                                 st.session_state.web_chain = get_web_extraction_chain(llm)
                             if st.session_state.pdf_chain and st.session_state.web_chain:
                                 logger.success("Extraction chains created.")
                                 # Keep extraction_performed as False here, it will run in the main section
@@ -428,7 +652,9 @@ with st.sidebar:
     # --- Display processed files status (Simplified) ---
     st.subheader("Processing Status")
     # Check if both chains are ready for the full process
-    if st.session_state.pdf_chain and st.session_state.web_chain and st.session_state.processed_files:
+    if st.session_state.retriever_load_future is not None:
+        st.info("Loading existing data from disk...")
+    elif st.session_state.pdf_chain and st.session_state.web_chain and st.session_state.processed_files:
         st.success(f"Ready. Processed: {', '.join(st.session_state.processed_files)}")
     elif persistence_enabled and st.session_state.retriever and (not st.session_state.pdf_chain or not st.session_state.web_chain):
          st.warning("Loaded existing data, but failed to create one or both extraction chains.")
@@ -459,46 +685,12 @@ if not st.session_state.pdf_chain or not st.session_state.web_chain:
 else:
     # --- Block 1: Run Extraction (if needed) --- 
     if (st.session_state.pdf_chain and st.session_state.web_chain) and not st.session_state.extraction_performed:
+        # Imported here so sessions that never run an extraction skip loading the prompt modules (cached in sys.modules afterwards)
+        from extraction_attributes import ATTRIBUTE_LLM_OVERRIDES, PROMPTS_TO_RUN
         # --- Get Part Number --- 
         part_number = st.session_state.get("part_number_input", "").strip()
         # ---------------------
 
-        # Define the prompts (attribute keys mapped to PDF and WEB instructions)
-        prompts_to_run = { 
-            # Material Properties
-            "Material Filling": {"pdf": MATERIAL_PROMPT, "web": MATERIAL_FILLING_WEB_PROMPT},
-            "Material Name": {"pdf": MATERIAL_NAME_PROMPT, "web": MATERIAL_NAME_WEB_PROMPT},
-            # Physical / Mechanical Attributes
-            "Pull-to-Seat": {"pdf": PULL_TO_SEAT_PROMPT, "web": PULL_TO_SEAT_WEB_PROMPT},
-            "Gender": {"pdf": GENDER_PROMPT, "web": GENDER_WEB_PROMPT},
-            "Height [MM]": {"pdf": HEIGHT_MM_PROMPT, "web": HEIGHT_MM_WEB_PROMPT},
-            "Length [MM]": {"pdf": LENGTH_MM_PROMPT, "web": LENGTH_MM_WEB_PROMPT},
-            "Width [MM]": {"pdf": WIDTH_MM_PROMPT, "web": WIDTH_MM_WEB_PROMPT},
-            "Number of Cavities": {"pdf": NUMBER_OF_CAVITIES_PROMPT, "web": NUMBER_OF_CAVITIES_WEB_PROMPT},
-            "Number of Rows": {"pdf": NUMBER_OF_ROWS_PROMPT, "web": NUMBER_OF_ROWS_WEB_PROMPT},
-            "Mechanical Coding": {"pdf": MECHANICAL_CODING_PROMPT, "web": MECHANICAL_CODING_WEB_PROMPT},
-            "Colour": {"pdf": COLOUR_PROMPT, "web": COLOUR_WEB_PROMPT},
-            "Colour Coding": {"pdf": COLOUR_CODING_PROMPT, "web": COLOUR_CODING_WEB_PROMPT},
-            # Sealing & Environmental
-            "Max. Working Temperature [°C]": {"pdf": WORKING_TEMPERATURE_PROMPT, "web": MAX_WORKING_TEMPERATURE_WEB_PROMPT},
-            "Min. Working Temperature [°C]": {"pdf": WORKING_TEMPERATURE_PROMPT, "web": MIN_WORKING_TEMPERATURE_WEB_PROMPT},
-            "Housing Seal": {"pdf": HOUSING_SEAL_PROMPT, "web": HOUSING_SEAL_WEB_PROMPT},
-            "Wire Seal": {"pdf": WIRE_SEAL_PROMPT, "web": WIRE_SEAL_WEB_PROMPT},
-            "Sealing": {"pdf": SEALING_PROMPT, "web": SEALING_WEB_PROMPT},
-            "Sealing Class": {"pdf": SEALING_CLASS_PROMPT, "web": SEALING_CLASS_WEB_PROMPT},
-            # Terminals & Connections
-            "Contact Systems": {"pdf": CONTACT_SYSTEMS_PROMPT, "web": CONTACT_SYSTEMS_WEB_PROMPT},
-            "Terminal Position Assurance": {"pdf": TERMINAL_POSITION_ASSURANCE_PROMPT, "web": TERMINAL_POSITION_ASSURANCE_WEB_PROMPT},
-            "Connector Position Assurance": {"pdf": CONNECTOR_POSITION_ASSURANCE_PROMPT, "web": CONNECTOR_POSITION_ASSURANCE_WEB_PROMPT},
-            "Closed Cavities": {"pdf": CLOSED_CAVITIES_PROMPT, "web": CLOSED_CAVITIES_WEB_PROMPT},
-            # Assembly & Type
-            "Pre-Assembled": {"pdf": PRE_ASSEMBLED_PROMPT, "web": PRE_ASSEMBLED_WEB_PROMPT},
-            "Type of Connector": {"pdf": CONNECTOR_TYPE_PROMPT, "web": CONNECTOR_TYPE_WEB_PROMPT},
-            "Set/Kit": {"pdf": SET_KIT_PROMPT, "web": SET_KIT_WEB_PROMPT},
-            # Specialized Attributes
-            "HV Qualified": {"pdf": HV_QUALIFIED_PROMPT, "web": HV_QUALIFIED_WEB_PROMPT}
-        }
-
         # --- Block 1a: Scrape Web Table HTML (if needed) --- 
         scraped_table_html = None # Initialize
         if part_number: # Only scrape if part number is provided
@@ -510,12 +702,12 @@ else:
                  # Scrape and update cache
                  logger.info(f"Part number {part_number} changed or not cached. Attempting web scrape...")
                  with st.spinner("Attempting to scrape data from supplier websites..."):
-                     scrape_start_time = time.time()
+                     scrape_start_ns = time.perf_counter_ns()
                      try:
                           # Ensure scrape_website_table_html is imported from llm_interface
                           from llm_interface import scrape_website_table_html
                           scraped_table_html = loop.run_until_complete(scrape_website_table_html(part_number))
-                          scrape_time = time.time() - scrape_start_time
+                          scrape_time = (time.perf_counter_ns() - scrape_start_ns) / 1e9
                           if scraped_table_html:
                               logger.success(f"Web scraping successful in {scrape_time:.2f} seconds.")
                               st.caption(f"ℹ️ Found web data for part# {part_number}. Will prioritize.")
@@ -526,7 +718,7 @@ else:
                           st.session_state.scraped_table_html_cache = scraped_table_html
                           st.session_state.current_part_number_scraped = part_number
                      except Exception as scrape_e:
-                          scrape_time = time.time() - scrape_start_time
+                          scrape_time = (time.perf_counter_ns() - scrape_start_ns) / 1e9
                           logger.error(f"Error during web scraping ({scrape_time:.2f}s): {scrape_e}", exc_info=True)
                           st.warning(f"An error occurred during web scraping: {scrape_e}. Using PDF data only.")
                           # Ensure cache is cleared on error
@@ -545,139 +737,90 @@ else:
         # -------------------------------------------------
 
         # --- Block 1b: Two-Stage Extraction Logic --- 
-        st.info(f"Running Stage 1 (Web Data Extraction) for {len(prompts_to_run)} attributes...")
+        st.info(f"Running Stage 1 (Web Data Extraction) for {len(PROMPTS_TO_RUN)} attributes...")
         
-        cols = st.columns(2) # For displaying progress
-        col_index = 0
-        SLEEP_INTERVAL_SECONDS = 0.2 # Can potentially be lower for web chain
+        # One fixed card per attribute, laid out up-front and filled as calls finish (Stage 2 reuses the same cards)
+        # Cards fill the columns row by row; every card's position is fixed, so out-of-order completions never shift the layout
+        status_slots = {
+            attribute_key: column.container(border=True).empty()
+            for attribute_key, column in zip(PROMPTS_TO_RUN, cycle(st.columns(config.RESULT_CARD_COLUMNS)))
+        }
         
         intermediate_results = {} # Store stage 1 results {prompt_name: {result_data}} 
         pdf_fallback_needed = [] # List of prompt_names needing stage 2
 
         # --- Stage 1: Web Extraction --- 
         if scraped_table_html:
-            for prompt_name, instructions in prompts_to_run.items(): # Iterate through attributes and their instructions
+            web_inputs = {
+                attribute_key: {
+                    "cleaned_web_data": scraped_table_html,
+                    "attribute_key": attribute_key,
+                    "extraction_instructions": instructions["web"] # Use specific web instruction
+                }
+                for attribute_key, instructions in PROMPTS_TO_RUN.items()
+            }
+            grouped_web_results = {}
+            if config.RULE_EXTRACTION:
+                grouped_web_results = run_rule_extraction(scraped_table_html, web_inputs, "Stage 1 (Web, rules)", status_slots)
+            llm_web_inputs = {key: input_data for key, input_data in web_inputs.items() if key not in grouped_web_results}
+            if config.GROUPED_WEB_EXTRACTION and len(llm_web_inputs) > 1:
+                # One request for all attributes; only the ones it leaves unanswered go out one by one
+                grouped_web_results.update(run_grouped_extraction(
+                    get_web_grouped_extraction_chain(llm), llm_web_inputs, "Stage 1 (Web, grouped)", status_slots, loop, source_key="web"
+                ))
+            web_results = run_extraction_stage(
+                st.session_state.web_chain,
+                {key: input_data for key, input_data in web_inputs.items() if key not in grouped_web_results},
+                "Stage 1 (Web)", status_slots, loop,
+                source_key="web", # The scraped data itself is part of each input
+                llm_overrides_by_attribute=ATTRIBUTE_LLM_OVERRIDES
+            )
+            web_results.update(grouped_web_results)
+
+            for prompt_name in PROMPTS_TO_RUN: # Parse in attribute order for a stable results table
                 attribute_key = prompt_name
-                web_instruction = instructions["web"] # Get WEB instruction
-                current_col = cols[col_index % 2]
-                col_index += 1
-                json_result_str = None
-                run_time = 0.0
+                json_result_str, run_time = web_results[prompt_name]
                 source = "Web" # Source for this stage
                 
-                with current_col:
-                     with st.spinner(f"Stage 1: Extracting {attribute_key} from Web Data..."):
-                        try:
-                            start_time = time.time()
-                            web_input = {
-                                "cleaned_web_data": scraped_table_html,
-                                "attribute_key": attribute_key,
-                                "extraction_instructions": web_instruction # Use specific web instruction
-                            }
-                            # --- Log the input to the web chain --- 
-                            logger.debug(f"Invoking web_chain for '{attribute_key}' with input keys: {list(web_input.keys())}")
-                            # -------------------------------------
-                            # Call helper using the web_chain
-                            json_result_str = loop.run_until_complete(
-                                _invoke_chain_and_process(st.session_state.web_chain, web_input, f"{attribute_key} (Web)")
-                            )
-                            run_time = time.time() - start_time
-                            logger.info(f"Stage 1 (Web) for '{attribute_key}' took {run_time:.2f} seconds.")
-                            time.sleep(SLEEP_INTERVAL_SECONDS) # Add delay
-                        except Exception as e:
-                             logger.error(f"Error during Stage 1 (Web) call for '{attribute_key}': {e}", exc_info=True)
-                             json_result_str = f'{{"error": "Exception during Stage 1 call: {e}"}}'
-                             run_time = time.time() - start_time # Record time even on error
-                
                 # --- Log the raw output from the web chain ---
                 logger.debug(f"Raw JSON result string from web_chain for '{attribute_key}': {json_result_str}")
                 # -----------------------------------------
                 
                 # --- Basic Parsing of Stage 1 Result --- 
-                final_answer_value = "Error"
-                parse_error = None
-                is_rate_limit = False
-                llm_returned_error_msg = None
                 raw_output = json_result_str if json_result_str else '{"error": "Stage 1 did not run"}'
-                needs_fallback = False
-                
-                try:
-                    # Minimal cleaning, rely on helper's cleaning primarily
-                    string_to_parse = raw_output.strip()
-                    parsed_json = json.loads(string_to_parse)
-                    
-                    if isinstance(parsed_json, dict):
-                        if attribute_key in parsed_json:
-                             parsed_value = str(parsed_json[attribute_key])
-                             # Check for NOT FOUND variants 
-                             if "not found" in parsed_value.lower() or parsed_value.strip() == "":
-                                 final_answer_value = "NOT FOUND"
-                                 needs_fallback = True # Mark for PDF stage
-                                 logger.info(f"Stage 1 result for '{attribute_key}' is NOT FOUND. Queued for PDF fallback.")
-                             else:
-                                 final_answer_value = parsed_value # Store successful web result
-                                 logger.success(f"Stage 1 successful for '{attribute_key}' from Web data.")
-                        elif "error" in parsed_json:
-                            # Handle errors from the web chain call
-                            error_msg = parsed_json['error']
-                            llm_returned_error_msg = error_msg
-                            if "rate limit" in error_msg.lower():
-                                final_answer_value = "Rate Limit Hit"
-                                is_rate_limit = True
-                                parse_error = ValueError("Rate limit hit (Web)")
-                            else:
-                                final_answer_value = f"Error: {error_msg[:100]}"
-                                parse_error = ValueError(f"Stage 1 Error: {error_msg}")
-                            needs_fallback = True # Also fallback on web chain error
-                            logger.warning(f"Stage 1 Error for '{attribute_key}'. Queued for PDF fallback. Error: {error_msg}")
-                        else:
-                             final_answer_value = "Unexpected JSON Format"
-                             parse_error = ValueError(f"Stage 1 Unexpected JSON keys: {list(parsed_json.keys())}")
-                             needs_fallback = True # Fallback on unexpected format
-                    else:
-                        final_answer_value = "Unexpected JSON Type"
-                        parse_error = TypeError(f"Stage 1 Expected dict, got {type(parsed_json)}")
-                        needs_fallback = True # Fallback
-                        logger.warning(f"Stage 1 Unexpected JSON type '{attribute_key}'. Queued for PDF fallback.")
-                        
-                except json.JSONDecodeError as json_err:
-                    parse_error = json_err
-                    final_answer_value = "Invalid JSON Response"
-                    logger.error(f"Failed to parse Stage 1 JSON for '{attribute_key}'. Error: {json_err}. String: '{string_to_parse}'")
-                    needs_fallback = True # Fallback on bad JSON
-                except Exception as processing_exc:
-                    parse_error = processing_exc
-                    final_answer_value = "Processing Error"
-                    logger.error(f"Error processing Stage 1 result for '{attribute_key}'. Error: {processing_exc}")
-                    needs_fallback = True # Fallback
+                result = parse_result(raw_output, attribute_key)
+                # Stage 1 normalizes every NOT FOUND variant; anything but a real value goes to the PDF stage
+                final_answer_value = "NOT FOUND" if result.status is Status.NOT_FOUND else result.value
+                if result.status is Status.OK:
+                    logger.success(f"Stage 1 successful for '{attribute_key}' from Web data.")
+                elif result.status is Status.NOT_FOUND:
+                    logger.info(f"Stage 1 result for '{attribute_key}' is NOT FOUND. Queued for PDF fallback.")
+                else:
+                    logger.warning(f"Stage 1 {final_answer_value} for '{attribute_key}'. Queued for PDF fallback. Error: {result.parse_error}")
                 
                 # Store intermediate result (even if NOT FOUND or error)
-                is_error = bool(parse_error) and not is_rate_limit
-                is_not_found_stage1 = final_answer_value == "NOT FOUND"
-                is_success_stage1 = not is_error and not is_not_found_stage1 and not is_rate_limit
-                
                 intermediate_results[prompt_name] = {
                     'Prompt Name': prompt_name,
                     'Extracted Value': final_answer_value, # Store Stage 1 value/error/NOT FOUND
                     'Ground Truth': '',
                     'Source': source,
                     'Raw Output': raw_output,
-                    'Parse Error': str(parse_error) if parse_error else None,
-                    'Is Success': is_success_stage1,
-                    'Is Error': is_error,
-                    'Is Not Found': is_not_found_stage1,
-                    'Is Rate Limit': is_rate_limit,
+                    'Parse Error': str(result.parse_error) if result.parse_error else None,
+                    'Is Success': result.status is Status.OK,
+                    'Is Error': result.status is Status.ERROR,
+                    'Is Not Found': result.status is Status.NOT_FOUND,
+                    'Is Rate Limit': result.status is Status.RATE_LIMIT,
                     'Latency (s)': round(run_time, 2),
                     'Exact Match': None,
                     'Case-Insensitive Match': None
                 }
                 
-                if needs_fallback:
+                if result.status is not Status.OK:
                     pdf_fallback_needed.append(prompt_name)
         
         else: # No scraped HTML, all attributes need PDF fallback
             logger.info("No scraped web data available. All attributes will use PDF extraction.")
-            pdf_fallback_needed = list(prompts_to_run.keys())
+            pdf_fallback_needed = list(PROMPTS_TO_RUN.keys())
             # Populate intermediate results with placeholders indicating skipped web stage
             for prompt_name in pdf_fallback_needed:
                  intermediate_results[prompt_name] = {
@@ -698,103 +841,82 @@ else:
 
         # --- Stage 2: PDF Fallback --- 
         st.info(f"Running Stage 2 (PDF Fallback) for {len(pdf_fallback_needed)} attributes...")
-        col_index = 0 # Reset column index
-        SLEEP_INTERVAL_SECONDS = 0.5 # Potentially longer delay for more complex chain
 
         if not pdf_fallback_needed:
             st.success("Stage 1 extraction successful for all attributes from web data.")
         else:
+            pdf_source_key = "|".join(st.session_state.processed_file_hashes or sorted(st.session_state.processed_files)) # Identifies the indexed PDFs
+            # Retrieve PDF context once for every fallback attribute instead of once per attribute,
+            # and keep it for the session so re-running extraction on the same PDFs skips the search
+            context_cache_key = ("PDF context", pdf_source_key, part_number, tuple(pdf_fallback_needed))
+            shared_pdf_context = st.session_state.extraction_cache.get(context_cache_key)
+            if shared_pdf_context is None:
+                shared_pdf_context = prefetch_pdf_context(
+                    st.session_state.retriever, pdf_fallback_needed, part_number if part_number else "Not Provided"
+                )
+                if shared_pdf_context:
+                    st.session_state.extraction_cache[context_cache_key] = shared_pdf_context
+            # Without a shared context each attribute gets its own; the queries are embedded in one batch up front
+            # rather than one retrieval at a time inside the chain
+            pdf_contexts = {} if shared_pdf_context else retrieve_pdf_contexts(
+                st.session_state.retriever, pdf_fallback_needed, part_number if part_number else "Not Provided"
+            )
+            pdf_inputs = {
+                attribute_key: {
+                    "extraction_instructions": PROMPTS_TO_RUN[attribute_key]["pdf"], # Use specific PDF instruction
+                    "attribute_key": attribute_key,
+                    "part_number": part_number if part_number else "Not Provided",
+                    "context": shared_pdf_context or pdf_contexts.get(attribute_key) # None -> chain retrieves per attribute
+                }
+                for attribute_key in pdf_fallback_needed
+            }
+            grouped_results = {}
+            if config.RULE_EXTRACTION and shared_pdf_context:
+                grouped_results = run_rule_extraction(shared_pdf_context, pdf_inputs, "Stage 2 (PDF, rules)", status_slots)
+            llm_pdf_inputs = {key: input_data for key, input_data in pdf_inputs.items() if key not in grouped_results}
+            if config.GROUPED_PDF_EXTRACTION and shared_pdf_context and len(llm_pdf_inputs) > 1:
+                # One request for all attributes; only the ones it leaves unanswered go out one by one
+                grouped_results.update(run_grouped_extraction(
+                    get_pdf_grouped_extraction_chain(llm), llm_pdf_inputs, "Stage 2 (PDF, grouped)", status_slots, loop, source_key=pdf_source_key,
+                    persist=bool(st.session_state.processed_file_hashes)
+                ))
+            pdf_results = run_extraction_stage(
+                st.session_state.pdf_chain,
+                {key: input_data for key, input_data in pdf_inputs.items() if key not in grouped_results},
+                "Stage 2 (PDF)", status_slots, loop,
+                source_key=pdf_source_key,
+                persist=bool(st.session_state.processed_file_hashes), # File names alone don't identify content
+                llm_overrides_by_attribute=ATTRIBUTE_LLM_OVERRIDES
+            )
+            pdf_results.update(grouped_results)
+
             for prompt_name in pdf_fallback_needed:
                 attribute_key = prompt_name
-                pdf_instruction = prompts_to_run[attribute_key]["pdf"] # Get specific PDF instruction
-                current_col = cols[col_index % 2]
-                col_index += 1
-                json_result_str = None
-                run_time = 0.0
+                json_result_str, run_time = pdf_results[prompt_name]
                 source = "PDF" # Source for this stage
                 
-                with current_col:
-                     with st.spinner(f"Stage 2: Extracting {attribute_key} from PDF Data..."):
-                        try:
-                            start_time = time.time()
-                            pdf_input = {
-                                "extraction_instructions": pdf_instruction, # Use specific PDF instruction
-                                "attribute_key": attribute_key,
-                                "part_number": part_number if part_number else "Not Provided"
-                            }
-                            # Call helper using the pdf_chain
-                            json_result_str = loop.run_until_complete(
-                                _invoke_chain_and_process(st.session_state.pdf_chain, pdf_input, f"{attribute_key} (PDF)")
-                            )
-                            run_time = time.time() - start_time
-                            logger.info(f"Stage 2 (PDF) for '{attribute_key}' took {run_time:.2f} seconds.")
-                            time.sleep(SLEEP_INTERVAL_SECONDS) # Add delay
-                        except Exception as e:
-                             logger.error(f"Error during Stage 2 (PDF) call for '{attribute_key}': {e}", exc_info=True)
-                             json_result_str = f'{{"error": "Exception during Stage 2 call: {e}"}}'
-                             run_time = time.time() - start_time
-                
                 # --- Basic Parsing of Stage 2 Result --- 
-                final_answer_value = "Error"
-                parse_error = None
-                is_rate_limit = False
-                llm_returned_error_msg = None
                 raw_output = json_result_str if json_result_str else '{"error": "Stage 2 did not run"}'
-                
-                try:
-                    string_to_parse = raw_output.strip()
-                    parsed_json = json.loads(string_to_parse)
-                    if isinstance(parsed_json, dict):
-                        if attribute_key in parsed_json:
-                            final_answer_value = str(parsed_json[attribute_key]) # Store final PDF result
-                            logger.success(f"Stage 2 successful for '{attribute_key}' from PDF data.")
-                        elif "error" in parsed_json:
-                            error_msg = parsed_json['error']
-                            llm_returned_error_msg = error_msg
-                            if "rate limit" in error_msg.lower():
-                                final_answer_value = "Rate Limit Hit"
-                                is_rate_limit = True
-                                parse_error = ValueError("Rate limit hit (PDF)")
-                            else:
-                                final_answer_value = f"Error: {error_msg[:100]}"
-                                parse_error = ValueError(f"Stage 2 Error: {error_msg}")
-                            logger.warning(f"Stage 2 Error for '{attribute_key}' from PDF. Error: {error_msg}")
-                        else:
-                             final_answer_value = "Unexpected JSON Format"
-                             parse_error = ValueError(f"Stage 2 Unexpected JSON keys: {list(parsed_json.keys())}")
-                             logger.warning(f"Stage 2 Unexpected JSON for '{attribute_key}'.")
-                    else:
-                         final_answer_value = "Unexpected JSON Type"
-                         parse_error = TypeError(f"Stage 2 Expected dict, got {type(parsed_json)}")
-                         logger.warning(f"Stage 2 Unexpected JSON type for '{attribute_key}'.")
-                         
-                except json.JSONDecodeError as json_err:
-                    parse_error = json_err
-                    final_answer_value = "Invalid JSON Response"
-                    logger.error(f"Failed to parse Stage 2 JSON for '{attribute_key}'. Error: {json_err}. String: '{string_to_parse}'")
-                except Exception as processing_exc:
-                    parse_error = processing_exc
-                    final_answer_value = "Processing Error"
-                    logger.error(f"Error processing Stage 2 result for '{attribute_key}'. Error: {processing_exc}")
-
-                # --- Update the result in intermediate_results with Stage 2 data --- 
-                is_error = bool(parse_error) and not is_rate_limit
-                is_not_found_stage2 = "not found" in final_answer_value.lower() or final_answer_value.strip() == ""
-                is_success_stage2 = not is_error and not is_not_found_stage2 and not is_rate_limit
+                result = parse_result(raw_output, attribute_key)
+                if result.status is Status.OK:
+                    logger.success(f"Stage 2 successful for '{attribute_key}' from PDF data.")
+                elif result.status is not Status.NOT_FOUND:
+                    logger.warning(f"Stage 2 {result.value} for '{attribute_key}' from PDF. Error: {result.parse_error}")
                 
                 # Add Stage 2 latency to existing Stage 1 latency if Stage 1 ran
                 stage1_latency = intermediate_results[prompt_name].get('Latency (s)', 0.0)
                 total_latency = stage1_latency + round(run_time, 2)
                 
+                # --- Update the result in intermediate_results with Stage 2 data --- 
                 intermediate_results[prompt_name].update({
-                    'Extracted Value': final_answer_value, # OVERWRITE with Stage 2 value/error
+                    'Extracted Value': result.value, # OVERWRITE with Stage 2 value/error
                     'Source': source, # Update source to PDF
                     'Raw Output': raw_output, # Store Stage 2 raw output
-                    'Parse Error': str(parse_error) if parse_error else None,
-                    'Is Success': is_success_stage2,
-                    'Is Error': is_error,
-                    'Is Not Found': is_not_found_stage2,
-                    'Is Rate Limit': is_rate_limit,
+                    'Parse Error': str(result.parse_error) if result.parse_error else None,
+                    'Is Success': result.status is Status.OK,
+                    'Is Error': result.status is Status.ERROR,
+                    'Is Not Found': result.status is Status.NOT_FOUND,
+                    'Is Rate Limit': result.status is Status.RATE_LIMIT,
                     'Latency (s)': total_latency 
                 })
                 logger.info(f"Updated result for '{prompt_name}' with PDF fallback data.")
@@ -1054,7 +1176,7 @@ else:
 
 def process_files(uploaded_files, urls):
     """Process uploaded files and URLs in parallel."""
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     logger.info(f"Starting processing for {len(uploaded_files)} files: {[f.name for f in uploaded_files]}")
     
     # Start PDF processing in background if there are PDFs
@@ -1097,164 +1219,20 @@ def process_files(uploaded_files, urls):
 # Add before the main processing logic
 def update_health_check():
     """Update the health check timestamp."""
-    st.session_state.last_health_check = time.time()
+    st.session_state.last_health_check = time.monotonic()
 
 def check_health_check_timeout():
     """Check if we're approaching the health check timeout."""
     if 'last_health_check' not in st.session_state:
-        st.session_state.last_health_check = time.time()
+        st.session_state.last_health_check = time.monotonic()
         return False
     
-    elapsed = time.time() - st.session_state.last_health_check
+    elapsed = time.monotonic() - st.session_state.last_health_check
     return elapsed > (config.HEALTH_CHECK_TIMEOUT - config.HEALTH_CHECK_GRACE_PERIOD)
 
-async def process_attribute_batch(attributes_batch, chain, is_web=False):
-    """Process a batch of attributes in parallel."""
-    tasks = []
-    for prompt_name, instructions in attributes_batch.items():
-        attribute_key = prompt_name
-        instruction = instructions["web" if is_web else "pdf"]
-        
-        input_data = {
-            "cleaned_web_data" if is_web else "extraction_instructions": instruction,
-            "attribute_key": attribute_key,
-            "part_number": st.session_state.get("part_number_input", "Not Provided")
-        }
-        
-        task = asyncio.create_task(
-            _invoke_chain_and_process(chain, input_data, f"{attribute_key} ({'Web' if is_web else 'PDF'})")
-        )
-        tasks.append((prompt_name, task))
-    
-    results = {}
-    for prompt_name, task in tasks:
-        try:
-            result = await task
-            results[prompt_name] = result
-            update_health_check()  # Update health check after each successful processing
-        except Exception as e:
-            logger.error(f"Error processing {prompt_name}: {e}")
-            results[prompt_name] = f'{{"error": "Exception during processing: {e}"}}'
-    
-    return results
-
-# Replace the existing attribute processing logic with this new implementation
-async def process_all_attributes(prompts_to_run, web_chain, pdf_chain, scraped_table_html):
-    """Process all attributes with parallel processing and health check handling."""
-    intermediate_results = {}
-    pdf_fallback_needed = []
-    
-    # Process web data if available
-    if scraped_table_html:
-        # Split attributes into batches for parallel processing
-        attribute_batches = [dict(list(prompts_to_run.items())[i:i + config.MAX_PARALLEL_ATTRIBUTES]) 
-                           for i in range(0, len(prompts_to_run), config.MAX_PARALLEL_ATTRIBUTES)]
-        
-        for batch in attribute_batches:
-            if check_health_check_timeout():
-                logger.warning("Approaching health check timeout, switching to PDF processing")
-                pdf_fallback_needed.extend(batch.keys())
-                continue
-                
-            batch_results = await process_attribute_batch(batch, web_chain, is_web=True)
-            
-            for prompt_name, result in batch_results.items():
-                # Process result and determine if PDF fallback is needed
-                try:
-                    parsed_json = json.loads(result.strip())
-                    if isinstance(parsed_json, dict):
-                        if prompt_name in parsed_json:
-                            value = str(parsed_json[prompt_name])
-                            if "not found" in value.lower() or value.strip() == "":
-                                pdf_fallback_needed.append(prompt_name)
-                        elif "error" in parsed_json:
-                            pdf_fallback_needed.append(prompt_name)
-                except:
-                    pdf_fallback_needed.append(prompt_name)
-                
-                intermediate_results[prompt_name] = {
-                    'Prompt Name': prompt_name,
-                    'Extracted Value': result,
-                    'Source': 'Web',
-                    'Latency (s)': 0.0  # Will be updated with actual latency
-                }
-    else:
-        pdf_fallback_needed = list(prompts_to_run.keys())
-    
-    # Process PDF fallback if needed
-    if pdf_fallback_needed:
-        pdf_batches = [pdf_fallback_needed[i:i + config.MAX_PARALLEL_ATTRIBUTES] 
-                      for i in range(0, len(pdf_fallback_needed), config.MAX_PARALLEL_ATTRIBUTES)]
-        
-        for batch in pdf_batches:
-            if check_health_check_timeout():
-                logger.error("Health check timeout reached during PDF processing")
-                break
-                
-            batch_prompts = {name: prompts_to_run[name] for name in batch}
-            batch_results = await process_attribute_batch(batch_prompts, pdf_chain, is_web=False)
-            
-            for prompt_name, result in batch_results.items():
-                if prompt_name in intermediate_results:
-                    intermediate_results[prompt_name].update({
-                        'Extracted Value': result,
-                        'Source': 'PDF'
-                    })
-                else:
-                    intermediate_results[prompt_name] = {
-                        'Prompt Name': prompt_name,
-                        'Extracted Value': result,
-                        'Source': 'PDF',
-                        'Latency (s)': 0.0
-                    }
-    
-    return intermediate_results
-
-# Update the main processing section to use the new parallel processing
-async def process_attributes_main():
-    """Main async function for processing attributes."""
-    if (st.session_state.pdf_chain and st.session_state.web_chain) and not st.session_state.extraction_performed:
-        # Initialize health check
-        update_health_check()
-        
-        # Get part number and scrape web data
-        part_number = st.session_state.get("part_number_input", "").strip()
-        scraped_table_html = None
-        
-        if part_number:
-            if (st.session_state.current_part_number_scraped == part_number and 
-                st.session_state.scraped_table_html_cache is not None):
-                scraped_table_html = st.session_state.scraped_table_html_cache
-            else:
-                with st.spinner("Scraping web data..."):
-                    try:
-                        scraped_table_html = await scrape_website_table_html(part_number)
-                        if scraped_table_html:
-                            st.session_state.scraped_table_html_cache = scraped_table_html
-                            st.session_state.current_part_number_scraped = part_number
-                    except Exception as e:
-                        logger.error(f"Web scraping error: {e}")
-        
-        # Process all attributes
-        with st.spinner("Processing attributes..."):
-            try:
-                intermediate_results = await process_all_attributes(
-                    prompts_to_run,
-                    st.session_state.web_chain,
-                    st.session_state.pdf_chain,
-                    scraped_table_html
-                )
-                
-                # Convert results to list and update session state
-                extraction_results_list = list(intermediate_results.values())
-                st.session_state.evaluation_results = extraction_results_list
-                st.session_state.extraction_performed = True
-                
-                st.success("Extraction complete!")
-            except Exception as e:
-                logger.error(f"Error during attribute processing: {e}")
-                st.error("Error during processing. Please try again.")
-
-# Call the async function
-if (st.session_state.pdf_chain and st.session_state.web_chain) and not st.session_state.extraction_performed:
-    asyncio.run(process_attributes_main())
\ No newline at end of file
+# --- Finish background load of existing data ---
+# Everything above has rendered by now; wait for the load to finish, then rerun so the sections pick it up
+if st.session_state.retriever_load_future is not None:
+    with st.spinner("Loading existing data from disk..."):
+        wait([st.session_state.retriever_load_future])
+    st.rerun()
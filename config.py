@@ -3,8 +3,11 @@ import os
 from dotenv import load_dotenv
 # from chromadb.config import Settings as ChromaSettings # <-- REMOVE OR COMMENT OUT this import
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (once per process tree; workers and child processes
+# inherit the already-populated environment instead of re-parsing .env)
+if "_DOTENV_LOADED" not in os.environ:
+    load_dotenv()
+    os.environ["_DOTENV_LOADED"] = "1"
 
 # --- API Keys ---
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -19,20 +22,45 @@ LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "qwen-qwq-32b") # Reverted to a kno
 
 # --- Vision Model Configuration ---
 VISION_MODEL_NAME = os.getenv("VISION_MODEL_NAME", "mistral-small-latest")  # Add vision model name
+PDF_PAGE_CONCURRENCY = int(os.getenv("PDF_PAGE_CONCURRENCY", 4)) # Pages (across all uploaded PDFs) sent to the Vision API at once
+PDF_PAGE_MAX_RETRIES = int(os.getenv("PDF_PAGE_MAX_RETRIES", 4)) # Retries (exponential backoff) of a page's Vision call on 429s / 5xx
 
 # --- Embedding Configuration ---
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
-EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu") # Add this line ('cpu' is default, 'cuda' if GPU available and configured)
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "auto") # 'auto' picks cuda/mps when available, else cpu; or set 'cpu'/'cuda'/'mps'
+EMBEDDING_FP16 = os.getenv("EMBEDDING_FP16", "true").lower() in ("1", "true", "yes") # Half precision weights when running on CUDA
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64)) # Chunks per encode forward pass
 NORMALIZE_EMBEDDINGS = True # Add this line (Often recommended for sentence transformers)
+# Inference backend for sentence-transformers: "torch" (default), "onnx" or "openvino" (install requirements-onnx.txt)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Optional model file for non-torch backends, e.g. "onnx/model_qint8_avx512.onnx" for an INT8-quantized CPU model
+EMBEDDING_MODEL_FILE = os.getenv("EMBEDDING_MODEL_FILE")
+# Optional ONNX Runtime execution provider, e.g. "CUDAExecutionProvider"
+EMBEDDING_ONNX_PROVIDER = os.getenv("EMBEDDING_ONNX_PROVIDER")
 # EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache") # Optional: Specify cache dir
 
 # --- Vector Store Configuration ---
 # Define the persistence directory (can be None for in-memory)
 CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db_prod") # Use consistent variable name
+# Optional Chroma server (`chroma run --path ./chroma_db_prod`). When CHROMA_HOST is set the index lives in
+# that process and the app connects over HTTP instead of loading it into memory.
+CHROMA_HOST = os.getenv("CHROMA_HOST")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", 8000))
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "pdf_qa_prod_collection") # Use the name expected by vector_store.py
+COLLECTIONS_KEPT = int(os.getenv("COLLECTIONS_KEPT", 10)) # Newest upload collections kept; older ones are deleted after each index
+VECTOR_STORE_BATCH_SIZE = int(os.getenv("VECTOR_STORE_BATCH_SIZE", 200)) # Chunks per bulk insert into Chroma
+# HNSW index parameters, applied when the collection is created. Datasheet corpora are small
+# (usually < 2k chunks), so a lower M / construction_ef builds faster and uses less RAM at no recall cost.
+CHROMA_COLLECTION_METADATA = {
+    # Embeddings are L2-normalized, so inner product ranks exactly like cosine without the per-distance norms
+    "hnsw:space": os.getenv("CHROMA_HNSW_SPACE", "ip" if NORMALIZE_EMBEDDINGS else "cosine"),
+    "hnsw:M": int(os.getenv("CHROMA_HNSW_M", 8)),
+    "hnsw:construction_ef": int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", 64)),
+    "hnsw:search_ef": int(os.getenv("CHROMA_HNSW_SEARCH_EF", 50)), # A bit above the default: MMR's fetch_k candidates need good recall
+}
 
 # *** Calculate the is_persistent flag ***
-is_persistent = bool(CHROMA_PERSIST_DIRECTORY) # True if directory is set, False otherwise
+is_persistent = bool(CHROMA_PERSIST_DIRECTORY or CHROMA_HOST) # True if directory or server is set, False otherwise
 
 # --- Text Splitting Configuration ---
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", (5000)))  # Restored
@@ -40,13 +68,66 @@ CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 75))  # Restored
 
 # --- Retriever Configuration ---
 RETRIEVER_K = int(os.getenv("RETRIEVER_K", 4)) # Renamed from RETRIEVER_SEARCH_K
+# MMR picks k diverse chunks out of fetch_k candidates, so near-duplicate chunks don't eat the prompt budget
+RETRIEVER_SEARCH_TYPE = os.getenv("RETRIEVER_SEARCH_TYPE", "mmr") # "mmr" or "similarity"
+RETRIEVER_FETCH_K = int(os.getenv("RETRIEVER_FETCH_K", 20)) # MMR candidate pool
+RETRIEVER_LAMBDA_MULT = float(os.getenv("RETRIEVER_LAMBDA_MULT", 0.6)) # MMR relevance (1.0) vs diversity (0.0)
+PREFETCH_CONTEXT_K = int(os.getenv("PREFETCH_CONTEXT_K", 8)) # Chunks retrieved once and shared by all PDF-stage attributes (0 = retrieve per attribute)
+# Extra chunks per attribute added to the shared context (0 = off); the attribute queries are embedded in one batch
+PREFETCH_PER_ATTRIBUTE_K = int(os.getenv("PREFETCH_PER_ATTRIBUTE_K", 0))
+# Ask for all PDF-stage attributes in one LLM call over the prefetched context; unanswered ones are retried per attribute
+GROUPED_PDF_EXTRACTION = os.getenv("GROUPED_PDF_EXTRACTION", "false").lower() in ("1", "true", "yes")
+# Same for the web stage: all attributes answered from the scraped table in one call
+GROUPED_WEB_EXTRACTION = os.getenv("GROUPED_WEB_EXTRACTION", "false").lower() in ("1", "true", "yes")
+# Output constraint for the grouped calls: "text" (prompt only), "json_object" (Groq JSON mode, always parses)
+# or "json_schema" (structured output against the attribute set's schema; needs a model that supports it).
+# Reasoning models need a reasoning_format other than "raw" on the Groq side for either JSON option.
+GROUPED_RESPONSE_FORMAT = os.getenv("GROUPED_RESPONSE_FORMAT", "text").lower()
+# Model for the grouped calls. They are deterministic field extraction against a fixed schema, so a fast
+# non-reasoning model with structured-output support (e.g. llama-3.1-8b-instant) can serve them.
+GROUPED_LLM_MODEL_NAME = os.getenv("GROUPED_LLM_MODEL_NAME") or LLM_MODEL_NAME
+# Answer regex-extractable attributes (filling, cavities, rows, temperature range) from the shared text before any LLM call
+RULE_EXTRACTION = os.getenv("RULE_EXTRACTION", "false").lower() in ("1", "true", "yes")
+RULE_MIN_MATCHES = int(os.getenv("RULE_MIN_MATCHES", 2)) # Agreeing occurrences needed before a rule's answer is used
+
+# --- Web Scraping ---
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", 4)) # Part numbers scraped at once (browser tabs) in batch lookups
+SCRAPE_MEMORY_THRESHOLD_PERCENT = float(os.getenv("SCRAPE_MEMORY_THRESHOLD_PERCENT", 80.0)) # Scrapes hold off opening pages above this RAM use
+SCRAPED_HTML_MAX_CHARS = int(os.getenv("SCRAPED_HTML_MAX_CHARS", 300_000)) # Larger scraped HTML is cut to the spec section before parsing
+# In-process cache of cleaned scrape results per part number, shared by all sessions
+SCRAPE_CACHE_SIZE = int(os.getenv("SCRAPE_CACHE_SIZE", 1024)) # Part numbers kept (least recently used evicted)
+SCRAPE_CACHE_TTL_SECONDS = int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", 3600))
+SCRAPE_CACHE_MISS_TTL_SECONDS = int(os.getenv("SCRAPE_CACHE_MISS_TTL_SECONDS", 60)) # Parts no site had data for
+# Successful scrapes are also kept on disk, so restarts and other workers skip the browser too
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "./scrape_cache") # Empty to disable
+SCRAPE_CACHE_DIR_SIZE_LIMIT = int(os.getenv("SCRAPE_CACHE_DIR_SIZE_LIMIT", 256 << 20)) # Bytes
+SCRAPE_DISK_CACHE_TTL_SECONDS = int(os.getenv("SCRAPE_DISK_CACHE_TTL_SECONDS", 86400)) # 1 day
+
+# --- Extraction Cache ---
+# Raw extraction outputs keyed by document content (PDF SHA-256 / scraped HTML), shared across sessions.
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "./extraction_cache") # Empty to disable
+EXTRACTION_CACHE_SIZE_LIMIT = int(os.getenv("EXTRACTION_CACHE_SIZE_LIMIT", 1 << 30)) # Bytes; least recently used entries are evicted
+EXTRACTION_CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", 30 * 86400)) # 30 days
 
 # --- LLM Request Configuration ---
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", 0.1)) # Adjusted default
 LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", 31550))
+LLM_SHORT_ANSWER_MAX_TOKENS = int(os.getenv("LLM_SHORT_ANSWER_MAX_TOKENS", 4096)) # Cap for single-value attributes (reasoning + answer)
+# Model for the simple single-value attributes (see extraction_attributes); rubric-heavy ones keep LLM_MODEL_NAME
+FAST_LLM_MODEL_NAME = os.getenv("FAST_LLM_MODEL_NAME") or LLM_MODEL_NAME
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 16)) # Keep-alive pool shared by all Groq calls
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", 120)) # Seconds; reasoning responses can take a while
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes") # Multiplex concurrent Groq calls over one connection (needs h2)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4)) # Retries (exponential backoff, honours Retry-After) on 429s / transient errors
+# Ceiling for the adaptive limit on concurrent Groq calls: it starts at MAX_PARALLEL_ATTRIBUTES, halves on a 429
+# and creeps back up while responses succeed (set equal to MAX_PARALLEL_ATTRIBUTES for a fixed cap)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+
+# --- UI ---
+RESULT_CARD_COLUMNS = int(os.getenv("RESULT_CARD_COLUMNS", 2)) # Columns of per-attribute status cards
 
 # --- Logging ---
-# LOG_LEVEL = "INFO" # Can be set via environment if needed
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO") # Level for the (queued) stderr sink set up in app.py
 
 # --- Health Check Configuration ---
 HEALTH_CHECK_TIMEOUT = int(os.getenv("HEALTH_CHECK_TIMEOUT", 300))  # 5 minutes
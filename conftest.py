@@ -0,0 +1,2 @@
+# conftest.py
+# Lets the tests in tests/ import the app's flat modules (result_parsing, rule_extractors, ...) from the repo root.
@@ -0,0 +1,137 @@
+# extraction_attributes.py
+# Maps each extracted attribute to its PDF and Web extraction instructions.
+# Lives in its own module so the mapping is built once at import instead of on every Streamlit rerun.
+from types import MappingProxyType
+from typing import Mapping
+
+import config
+from extraction_prompts import (
+    # Material Properties
+    MATERIAL_PROMPT,
+    MATERIAL_NAME_PROMPT,
+    # Physical / Mechanical Attributes
+    PULL_TO_SEAT_PROMPT,
+    GENDER_PROMPT,
+    HEIGHT_MM_PROMPT,
+    LENGTH_MM_PROMPT,
+    WIDTH_MM_PROMPT,
+    NUMBER_OF_CAVITIES_PROMPT,
+    NUMBER_OF_ROWS_PROMPT,
+    MECHANICAL_CODING_PROMPT,
+    COLOUR_PROMPT,
+    COLOUR_CODING_PROMPT,
+    # Sealing & Environmental
+    WORKING_TEMPERATURE_PROMPT,
+    HOUSING_SEAL_PROMPT,
+    WIRE_SEAL_PROMPT,
+    SEALING_PROMPT,
+    SEALING_CLASS_PROMPT,
+    # Terminals & Connections
+    CONTACT_SYSTEMS_PROMPT,
+    TERMINAL_POSITION_ASSURANCE_PROMPT,
+    CONNECTOR_POSITION_ASSURANCE_PROMPT,
+    CLOSED_CAVITIES_PROMPT,
+    # Assembly & Type
+    PRE_ASSEMBLED_PROMPT,
+    CONNECTOR_TYPE_PROMPT,
+    SET_KIT_PROMPT,
+    # Specialized Attributes
+    HV_QUALIFIED_PROMPT
+)
+from extraction_prompts_web import (
+    # Material Properties
+    MATERIAL_FILLING_WEB_PROMPT,
+    MATERIAL_NAME_WEB_PROMPT,
+    # Physical / Mechanical Attributes
+    PULL_TO_SEAT_WEB_PROMPT,
+    GENDER_WEB_PROMPT,
+    HEIGHT_MM_WEB_PROMPT,
+    LENGTH_MM_WEB_PROMPT,
+    WIDTH_MM_WEB_PROMPT,
+    NUMBER_OF_CAVITIES_WEB_PROMPT,
+    NUMBER_OF_ROWS_WEB_PROMPT,
+    MECHANICAL_CODING_WEB_PROMPT,
+    COLOUR_WEB_PROMPT,
+    COLOUR_CODING_WEB_PROMPT,
+    # Sealing & Environmental
+    MAX_WORKING_TEMPERATURE_WEB_PROMPT,
+    MIN_WORKING_TEMPERATURE_WEB_PROMPT,
+    HOUSING_SEAL_WEB_PROMPT,
+    WIRE_SEAL_WEB_PROMPT,
+    SEALING_WEB_PROMPT,
+    SEALING_CLASS_WEB_PROMPT,
+    # Terminals & Connections
+    CONTACT_SYSTEMS_WEB_PROMPT,
+    TERMINAL_POSITION_ASSURANCE_WEB_PROMPT,
+    CONNECTOR_POSITION_ASSURANCE_WEB_PROMPT,
+    CLOSED_CAVITIES_WEB_PROMPT,
+    # Assembly & Type
+    PRE_ASSEMBLED_WEB_PROMPT,
+    CONNECTOR_TYPE_WEB_PROMPT,
+    SET_KIT_WEB_PROMPT,
+    # Specialized Attributes
+    HV_QUALIFIED_WEB_PROMPT
+)
+
+# Attribute keys mapped to PDF and WEB instructions
+# Read-only view: shared by every session in the process, so nothing may mutate it
+PROMPTS_TO_RUN: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    # Material Properties
+    "Material Filling": {"pdf": MATERIAL_PROMPT, "web": MATERIAL_FILLING_WEB_PROMPT},
+    "Material Name": {"pdf": MATERIAL_NAME_PROMPT, "web": MATERIAL_NAME_WEB_PROMPT},
+    # Physical / Mechanical Attributes
+    "Pull-to-Seat": {"pdf": PULL_TO_SEAT_PROMPT, "web": PULL_TO_SEAT_WEB_PROMPT},
+    "Gender": {"pdf": GENDER_PROMPT, "web": GENDER_WEB_PROMPT},
+    "Height [MM]": {"pdf": HEIGHT_MM_PROMPT, "web": HEIGHT_MM_WEB_PROMPT},
+    "Length [MM]": {"pdf": LENGTH_MM_PROMPT, "web": LENGTH_MM_WEB_PROMPT},
+    "Width [MM]": {"pdf": WIDTH_MM_PROMPT, "web": WIDTH_MM_WEB_PROMPT},
+    "Number of Cavities": {"pdf": NUMBER_OF_CAVITIES_PROMPT, "web": NUMBER_OF_CAVITIES_WEB_PROMPT},
+    "Number of Rows": {"pdf": NUMBER_OF_ROWS_PROMPT, "web": NUMBER_OF_ROWS_WEB_PROMPT},
+    "Mechanical Coding": {"pdf": MECHANICAL_CODING_PROMPT, "web": MECHANICAL_CODING_WEB_PROMPT},
+    "Colour": {"pdf": COLOUR_PROMPT, "web": COLOUR_WEB_PROMPT},
+    "Colour Coding": {"pdf": COLOUR_CODING_PROMPT, "web": COLOUR_CODING_WEB_PROMPT},
+    # Sealing & Environmental
+    "Max. Working Temperature [°C]": {"pdf": WORKING_TEMPERATURE_PROMPT, "web": MAX_WORKING_TEMPERATURE_WEB_PROMPT},
+    "Min. Working Temperature [°C]": {"pdf": WORKING_TEMPERATURE_PROMPT, "web": MIN_WORKING_TEMPERATURE_WEB_PROMPT},
+    "Housing Seal": {"pdf": HOUSING_SEAL_PROMPT, "web": HOUSING_SEAL_WEB_PROMPT},
+    "Wire Seal": {"pdf": WIRE_SEAL_PROMPT, "web": WIRE_SEAL_WEB_PROMPT},
+    "Sealing": {"pdf": SEALING_PROMPT, "web": SEALING_WEB_PROMPT},
+    "Sealing Class": {"pdf": SEALING_CLASS_PROMPT, "web": SEALING_CLASS_WEB_PROMPT},
+    # Terminals & Connections
+    "Contact Systems": {"pdf": CONTACT_SYSTEMS_PROMPT, "web": CONTACT_SYSTEMS_WEB_PROMPT},
+    "Terminal Position Assurance": {"pdf": TERMINAL_POSITION_ASSURANCE_PROMPT, "web": TERMINAL_POSITION_ASSURANCE_WEB_PROMPT},
+    "Connector Position Assurance": {"pdf": CONNECTOR_POSITION_ASSURANCE_PROMPT, "web": CONNECTOR_POSITION_ASSURANCE_WEB_PROMPT},
+    "Closed Cavities": {"pdf": CLOSED_CAVITIES_PROMPT, "web": CLOSED_CAVITIES_WEB_PROMPT},
+    # Assembly & Type
+    "Pre-Assembled": {"pdf": PRE_ASSEMBLED_PROMPT, "web": PRE_ASSEMBLED_WEB_PROMPT},
+    "Type of Connector": {"pdf": CONNECTOR_TYPE_PROMPT, "web": CONNECTOR_TYPE_WEB_PROMPT},
+    "Set/Kit": {"pdf": SET_KIT_PROMPT, "web": SET_KIT_WEB_PROMPT},
+    # Specialized Attributes
+    "HV Qualified": {"pdf": HV_QUALIFIED_PROMPT, "web": HV_QUALIFIED_WEB_PROMPT}
+})
+
+# Attributes whose answer is a single short value (yes/no, a code, a colour). Their calls are capped at
+# config.LLM_SHORT_ANSWER_MAX_TOKENS instead of the global LLM_MAX_OUTPUT_TOKENS, which shrinks Groq's
+# per-request token reservation. The cap still leaves room for the reasoning model's <think> block.
+SHORT_ANSWER_ATTRIBUTES = frozenset({
+    "Material Filling", "Pull-to-Seat", "Gender", "Number of Rows", "Colour", "Colour Coding",
+    "Housing Seal", "Wire Seal", "Sealing Class", "Terminal Position Assurance",
+    "Connector Position Assurance", "Closed Cavities", "Pre-Assembled", "Set/Kit", "HV Qualified",
+})
+# Short-answer attributes whose instructions are still a multi-step rubric; they stay on LLM_MODEL_NAME
+# when FAST_LLM_MODEL_NAME routes the other short-answer attributes to a faster model
+REASONING_ATTRIBUTES = frozenset({"Gender", "Colour Coding"})
+
+def _llm_overrides(attribute_key: str) -> Mapping[str, object]:
+    overrides = {}
+    if attribute_key in SHORT_ANSWER_ATTRIBUTES:
+        overrides["max_tokens"] = min(config.LLM_SHORT_ANSWER_MAX_TOKENS, config.LLM_MAX_OUTPUT_TOKENS)
+        if attribute_key not in REASONING_ATTRIBUTES and config.FAST_LLM_MODEL_NAME != config.LLM_MODEL_NAME:
+            overrides["model_name"] = config.FAST_LLM_MODEL_NAME
+    return MappingProxyType(overrides)
+
+# Per-attribute LLM settings (configurable fields, see llm_interface.initialize_llm); attributes not listed use the defaults
+ATTRIBUTE_LLM_OVERRIDES: Mapping[str, Mapping[str, object]] = MappingProxyType({
+    attribute_key: _llm_overrides(attribute_key)
+    for attribute_key in PROMPTS_TO_RUN if _llm_overrides(attribute_key)
+})
@@ -1,4 +1,6 @@
 # Prompts for material property extraction and other connector attributes
+import inspect
+import re
 
 # --- Material Properties ---
 
@@ -49,11 +51,9 @@ Extract primary polymer material using this reasoning chain:
 
     **Examples:**
     - **\"Connector: PA6-GF30 (60% resin)\"**
-      → REASONING: [Step1 ✓] PA6+GF → [Step2 ✓] PA6 → [Step3 ✓] 60% → [Step4 ✓] Specific grade → [Step5 ✓] Validated
       → MATERIAL NAME: **PA6**
 
     - **\"Housing: GF40 Polymer\"**
-      → REASONING: [Step1 ✓] GF additive → [Step2 ✗] No base polymer → [Step5 ✗] Uncertain
       → MATERIAL NAME: **NOT FOUND**
 
     **Output format:**
@@ -107,15 +107,12 @@ Determine Pull-To-Seat requirement using this reasoning chain:
 
     Examples:
     \"Terminals require pull-back action for seating\"
-    → REASONING: [Step1] Pull-back → [Step2] Assembly → [Step4] Manual action
     → PULL-TO-SEAT: Yes
 
     \"Pre-inserted contacts with CPA secondary lock\"
-    → REASONING: [Step1] Pre-inserted → [Step3] Alternative method
     → PULL-TO-SEAT: No
 
     \"Secure insertion method\"
-    → REASONING: [Step1] Vague → [Step5] Ambiguous
     → PULL-TO-SEAT: No
 
   Output format:
@@ -201,19 +198,15 @@ STEP 5: FINAL VALIDATION
 Examples:
 
 "Part Name: Receptacle Assembly. Drawing shows pin contacts in all positions."
-→ REASONING: [Step1] Pin contacts (Male function) → [Step3] "Receptacle" = Female assembly → [Step4] Priority Rule applied: Manufacturer Nomenclature 'Receptacle' determines Female assembly gender, overriding internal contact type → [Step5] Uniform Female assembly.
 → GENDER: Female
 
 "Part Name: Plug Assembly. Document specifies applicable socket terminals."
-→ REASONING: [Step1] Socket terminals (Female function) → [Step3] "Plug" = Male assembly → [Step4] Priority Rule applied: Manufacturer Nomenclature 'Plug' determines Male assembly gender, overriding internal contact type → [Step5] Uniform Male assembly.
 → GENDER: Male
 
 "Combo Connector: Cavities A1-A5 accept pins, B1-B5 accept sockets."
-→ REASONING: [Step1] Both Pin & Socket contacts → [Step2] Separate cavities → [Step3] "Combo" = Likely Hybrid → [Step4] Cavity evidence confirms Hybrid → [Step5] Hybrid assembly.
 → GENDER: Hybrid
 
 Output format:
-REASONING: [Key determinations following the steps and priority rule]
 GENDER: [Male/Female/Unisex/Hybrid]
 """
 
@@ -265,15 +258,12 @@ Determine connector height using this reasoning chain:
 
     Examples:
     \"Rectangular housing Y=6.2mm + CPA locked (+1.0mm)\"
-    → REASONING: [Step2] Y-components → [Step4] 6.2+1 → [Step5] Sum
     → HEIGHT [MM]: 7.2
 
     \"Round connector Ø8.4 with radial seal\"
-    → REASONING: [Step1] Round → [Step5] Diameter=height
     → HEIGHT [MM]: 8.4
 
     \"X=15mm/Y=18mm (special profile)\"
-    → REASONING: [Step1] Y>X allowed → [Step3] Direct Y-value
     → HEIGHT [MM]: 18
 
     Output format:
@@ -329,15 +319,12 @@ Determine connector length using this reasoning chain:
 
     Examples:
     \"Rectangular Z=25mm + CPA locked (+2.0mm)\"
-    → REASONING: [Step2] Z-components → [Step4] 25+2 → [Step6] Valid
     → LENGTH [MM]: 27
 
     \"Round connector Ø12mm (Z=15mm)\"
-    → REASONING: [Step1] Round → [Step3] Direct Z-value
     → LENGTH [MM]: 15
 
     \"2023 Spec: 40mm | 2025 Spec: 35mm\"
-    → REASONING: [Step5] Newer doc → [Step6] Valid
     → LENGTH [MM]: 35
 
     Output format:
@@ -384,15 +371,12 @@ Determine connector width using this reasoning chain:
 
     Examples:
     \"Rectangular housing X=32mm (CPA locked)\"
-    → REASONING: [Step1] Rect ✓ → [Step3] Direct value
     → WIDTH [MM]: 32
 
     \"Round connector Ø15.5 + TPA (+0.7mm)\"
-    → REASONING: [Step1] Round → [Step2] 15.5+0.7 → 16.2
     → WIDTH [MM]: 16.2
 
     \"X-axis: 25mm (pre-lock) / 26.2mm (CPA engaged)\"
-    → REASONING: [Step2] Locked state → 26.2
     → WIDTH [MM]: 26.2
 
     Output format:
@@ -439,15 +423,12 @@ Determine cavity count using this reasoning chain:
 
     Examples:
     \"Housing: 4-CAVITY (DW-123 Rev.3)\"
-    → REASONING: [Step1] Title block → [Step3] Latest rev → [Step5] Valid
     → NUMBER OF CAVITIES: 4
 
     \"PN: XT-60-2P (marketing sheet: 3-way)\"
-    → REASONING: [Step1] Conflict → [Step3] Prefer PN suffix → [Step4] 2P=2
     → NUMBER OF CAVITIES: 2
 
     \"Single-row connector (no numbers)\"
-    → REASONING: [Step1] No indicators → [Step5] Default
     → NUMBER OF CAVITIES: 999
 
     Output format:
@@ -509,15 +490,12 @@ Determine mechanical coding using this reasoning chain:
 
     Examples:
     \"Positioning: Coding C (DWG-123 Rev.2)\"
-    → REASONING: [Step1] Explicit → [Step3] Valid case → [Step5] Confirmed
     → MECHANICAL CODING: C
 
     \"Keyed slots shown in Fig.5 (unlabeled)\"
-    → REASONING: [Step2] Visual-only → [Step3] Ambiguous → \"no naming\"
     → MECHANICAL CODING: no naming
 
     \"Universal connector for all variants\"
-    → REASONING: [Step3] Family-wide → Z
     → MECHANICAL CODING: Z
 
     Output format:
@@ -568,15 +546,12 @@ Determine connector color using this reasoning chain:
 
     Examples:
     \"Black nylon housing with nickel-plated contacts\"
-    → REASONING: [Step1] Single-piece → [Step2] Housing color → [Step4] Explicit
     → COLOUR: Black
 
     \"Assembly: White cover (60%), grey base (40%)\"
-    → REASONING: [Step1] Assembly → [Step3] White dominant → [Step5] Majority
     → COLOUR: White
 
     \"Red/blue dual-tone design\"
-    → REASONING: [Step1] Single-piece → [Step3] Equal prominence → [Step5] Multi
     → COLOUR: multi
 
     Output format:
@@ -621,11 +596,9 @@ Determine Colour Coding using this reasoning chain:
 
     EXAMPLES:
     \"Type A (Blue CPA) vs Type B (Red CPA)\"
-    → REASONING: [Step1] Mech coding ✓ → [Step3] Color diff ✓ → [Step4] Explicit
     → COLOUR CODING: Blue/Red (depending on variant)
 
     \"Black housing with black CPA/TTA\"
-    → REASONING: [Step1] Mech coding ✓ → [Step3] No diff → \"none\"
     → COLOUR CODING: none
 
     Output format:
@@ -684,15 +657,12 @@ Determine working temperatures using this reasoning chain:
 
     Examples:
     \"Rated for -40°C → 125°C (AEC-Q200)\"
-    → REASONING: [Step1] Explicit range + automotive standard → [Step2] Max=125 → [Step3] Min=-40
     → WORKING TEMPERATURE: 125, -40
 
     \"Max. temp 150°C (UL RTI)\"
-    → REASONING: [Step1] Explicit max + UL → [Step2] Max=150 → [Step3] No min → 999
     → WORKING TEMPERATURE: 150, 999
 
     \"High-temp polymer connector\"
-    → REASONING: [Step1] No data → [Step5] Both 999
     → WORKING TEMPERATURE: NOT FOUND
 
   Output format:
@@ -745,23 +715,18 @@ STEP 5: FINAL VALIDATION
 
 Examples:
 "Housing-to-counterpart seal: radial seal"
-→ REASONING: [Step1] Match → [Step2] Context → Valid
 → HOUSING SEAL: Radial Seal
 
 "interface seal (P/N RS-456)"
-→ REASONING: [Step1] Match → [Step2] Not about housing → Rejected
 → HOUSING SEAL: NOT FOUND
 
 "Radial Seal (primary) + Interface Seal (secondary)"
-→ REASONING: [Step1] Multiple → [Step3] Hierarchy → Radial
 → HOUSING SEAL: Radial Seal
 
 "Connector uses a molded ring seal to prevent ingress"
-→ REASONING: [Step4] Ring Seal Detected → [Step2] Context → Valid Mapping
 → HOUSING SEAL: Radial Seal
 
 Output format:
-REASONING: [Key determinations]
 HOUSING SEAL: [Radial Seal / Interface Seal ]
 
 """
@@ -815,15 +780,12 @@ Determine sealing status using this reasoning chain:
 
     Examples:
     \"IPx9K-rated for high-pressure washdown\"
-    → REASONING: [Step1] IPx9K → [Step2] Sealed
     → SEALING: Sealed
 
     \"No IP rating but includes silicone gasket\"
-    → REASONING: [Step1] No IP → [Step3] Gasket → Sealed
     → SEALING: Sealed
 
     \"IPx0 connector with 'dust-resistant' claim\"
-    → REASONING: [Step1] IPx0 → [Step4] Overrides description → Unsealed
     → SEALING: Unsealed
 
     Output format:
@@ -876,15 +838,12 @@ Identify approved contact systems using this reasoning chain:
 
     Examples:
     \"Approved systems: MQS 0.64 & SLK 2.8 (P/N 345-789)\"
-    → REASONING: [Step1] MQS/SLK explicit → [Step2] Approved → [Step5] Standardized
     → CONTACT SYSTEMS: MQS 0.64,SLK 2.8
 
     \"Terminals: 927356-1 (MCP series)\"
-    → REASONING: [Step1] Part number → [Step3] Mapped to MCP → [Step2] Implicit approval
     → CONTACT SYSTEMS: MCP
 
     \"Compatible with various 2.8mm systems\"
-    → REASONING: [Step1] Vague → [Step5] Non-specific → [Final] NOT FOUND
     → CONTACT SYSTEMS: NOT FOUND
 
     Output format:
@@ -928,15 +887,12 @@ Determine Terminal Position Assurance (TPA) count using this reasoning chain:
 
     Examples:
     \"Preassembled dual TPA (P/N TPA2-456)\"
-    → REASONING: [Step1] TPA term + P/N → [Step2] Preassembled → [Step3] Explicit count
     → TERMINAL POSITION ASSURANCE: 2
 
     \"Install TPA-7A during wire harnessing\"
-    → REASONING: [Step2] Requires assembly → Return 0
     → TERMINAL POSITION ASSURANCE: 0
 
     \"6-cavity housing with 1 TPA per 3 cavities\"
-    → REASONING: [Step3] 6 ÷ 3 = 2 → Valid
     → TERMINAL POSITION ASSURANCE: 2
 
     Output format:
@@ -974,15 +930,12 @@ Determine Connector Position Assurance (CPA) status using this reasoning chain:
 
     Examples:
     \"Includes CPA latch (P/N CPA-456)\"
-    → REASONING: [Step1] Term + P/N → **Yes**
     → CONNECTOR POSITION ASSURANCE: Yes
 
     \"No secondary locking features\"
-    → REASONING: [Step4] Explicit denial → **No**
     → CONNECTOR POSITION ASSURANCE: No
 
     \"Secure mating interface\"
-    → REASONING: [Step1-3] No CPA terms → **NOT FOUND**
     → CONNECTOR POSITION ASSURANCE: NOT FOUND
 
     Output format:
@@ -1017,19 +970,15 @@ Determine closed cavities using this reasoning chain:
 
     Examples:
     \"Closed cavities: 2,4,6 (see diagram)\"
-    → REASONING: [Step1-2] Explicit numbers → **2,4,6**
     → NAME OF CLOSED CAVITIES: 2,4,6
 
     \"All cavities open for wire access\"
-    → REASONING: [Step3] All open → **none**
     → NAME OF CLOSED CAVITIES: none
 
     \"Positions 3 and 5 are blocked\"
-    → REASONING: [Step1-2] Blocked = closed but unnumbered → **none**
     → NAME OF CLOSED CAVITIES: none
 
     \"Closed cavities unspecified\"
-    → REASONING: [Step4] Ambiguous → **none**
     → NAME OF CLOSED CAVITIES: none
 
     Output format:
@@ -1078,15 +1027,12 @@ Determine pre-assembly status using this reasoning chain:
 
     Examples:
     \"Fully assembled connector; disassemble terminals before wiring\"
-    → REASONING: [Step1] Assembly + disassembly → [Step5] Yes
     → PRE-ASSEMBLED: Yes
 
     \"Includes preassembled CPA latch (no disassembly required)\"
-    → REASONING: [Step2] Component-only → [Step5] No
     → PRE-ASSEMBLED: No
 
     \"Modular housing with TPA\"
-    → REASONING: [Step1] No disassembly context → [Step5] Default
     → PRE-ASSEMBLED: NOT FOUND
 
     Output format:
@@ -1126,19 +1072,15 @@ Determine the **Type of Connector** using this reasoning chain:
 
     Examples:
     \"Modular Contact Carrier (P/N CC-234)\"
-    → REASONING: [Step1] Explicit → **Contact Carrier**
     → TYPE OF CONNECTOR: Contact Carrier
 
     \"Connector for actuator assembly in robotic arm\"
-    → REASONING: [Step2] \"actuator\" context → **Actuator**
     → TYPE OF CONNECTOR: Actuator
 
     \"General automotive wiring connector\"
-    → REASONING: [Step4] Generic → **Standard**
     → TYPE OF CONNECTOR: Standard
 
     \"High-voltage junction module\"
-    → REASONING: [Step1-2] No matches → [Step4] **NOT FOUND**
     → TYPE OF CONNECTOR: NOT FOUND
 
     Output format:
@@ -1178,19 +1120,15 @@ Determine the **Set/Kit** status using this reasoning chain:
 
     Examples:
     \"Connector Set (P/N L-789) includes cover, lever (no assembly required)\"
-    → REASONING: [Step1] Single P/N + accessories → **Yes**
     → SET/KIT: Yes
 
     \"Main housing (L-456), Cover (L-457), TPA (L-458)\"
-    → REASONING: [Step1] Multiple P/Ns → **No**
     → SET/KIT: No
 
     \"Kit with unassembled components (P/N L-999)\"
-    → REASONING: [Step4] Explicit \"Kit\" → **Yes**
     → SET/KIT: Yes
 
     \"Connector with accessories (no P/N specified)\"
-    → REASONING: [Step5] Ambiguous → **NOT FOUND**
     → SET/KIT: NOT FOUND
 
     Output format:
@@ -1248,17 +1186,30 @@ Determine HV qualification using this reasoning chain:
 
     Examples:
     \"800V battery connector (IEC 62196)\"
-    → REASONING: [Step1] >60V but no HV term → [Step5] Fails dual req → No
     → HV QUALIFIED: No
 
     \"HV-qualified per LV215-1\"
-    → REASONING: [Step2] Explicit term → [Step5] Valid → Yes
     → HV QUALIFIED: Yes
 
     \"60V hybrid system with HV markings\"
-    → REASONING: [Step1] 60V → Auto reject
     → HV QUALIFIED: No
 
     Output format:
     HV QUALIFIED: [Yes/No]
-"""
\ No newline at end of file
+"""
+
+
+# --- Normalization ---
+_BLANK_LINE_RUN_RE = re.compile(r"\n{3,}")
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a prompt literal: surrounding blank lines dropped, common indentation removed
+    (inspect.cleandoc), trailing spaces stripped and blank-line runs collapsed. Keeps the bytes sent to
+    the model (and the extraction cache keys) stable across source reformatting, and trims whitespace tokens.
+    """
+    lines = (line.rstrip() for line in inspect.cleandoc(prompt).splitlines())
+    return _BLANK_LINE_RUN_RE.sub("\n\n", "\n".join(lines))
+
+# Applied once at import to every prompt constant of this module
+globals().update({name: normalize_prompt(value) for name, value in list(globals().items()) if name.endswith("_PROMPT")})
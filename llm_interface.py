@@ -1,23 +1,169 @@
 # llm_interface.py
-import requests
-import json
-from typing import List, Dict, Optional
+import httpx
+import hashlib
+import diskcache
+import importlib.util
+import orjson # Fast (de)serialization of LLM response and crawl4ai extraction payloads
+from typing import Annotated, List, Dict, Optional, Tuple, Type
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, create_model
 from loguru import logger
 from langchain.vectorstores.base import VectorStoreRetriever
 from langchain.docstore.document import Document
 
 # Recommended: Use LangChain's Groq integration
 from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel
-from langchain_core.output_parsers import StrOutputParser
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import ConfigurableField, RunnablePassthrough, RunnableParallel
+from langchain_core.utils.json import parse_partial_json
 
 import config # Import configuration
+from result_parsing import clean_chain_response
 import asyncio # Need asyncio for crawl4ai
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+from crawl4ai.async_dispatcher import MemoryAdaptiveDispatcher, RateLimiter
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 from bs4 import BeautifulSoup # Import BeautifulSoup
 import re # Import re for regular expressions
+import threading
+import time
+
+# --- Rate limiting from Groq's response headers ---
+_RESET_PART_RE = re.compile(r"([\d.]+)(ms|h|m|s)")
+_RESET_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def _parse_reset_seconds(value: str) -> float:
+    """Parses Groq's reset durations ("2m59.56s", "7.66s", "120ms") into seconds."""
+    return sum(float(amount) * _RESET_UNIT_SECONDS[unit] for amount, unit in _RESET_PART_RE.findall(value))
+
+class GroqRateLimiter:
+    """
+    Paces Groq calls from the budget the API reports (x-ratelimit-remaining-requests/-tokens and
+    Retry-After) instead of a fixed worst-case delay: requests only wait when a budget is exhausted,
+    until Groq says it resets.
+    """
+    def __init__(self):
+        self.remaining_requests: Optional[int] = None # Left in the current RPD/RPM window
+        self.remaining_tokens: Optional[int] = None # Left in the current TPM window
+        self.resume_at = 0.0 # time.monotonic() before which no new request is sent
+
+    def update(self, status_code: int, headers) -> None:
+        now = time.monotonic()
+        for budget in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{budget}")
+            if remaining is None:
+                continue
+            try:
+                remaining = int(float(remaining))
+            except ValueError:
+                continue
+            setattr(self, f"remaining_{budget}", remaining)
+            reset = headers.get(f"x-ratelimit-reset-{budget}")
+            if remaining <= 0 and reset:
+                self.resume_at = max(self.resume_at, now + _parse_reset_seconds(reset))
+        retry_after = headers.get("retry-after")
+        if status_code == 429 and retry_after:
+            try:
+                self.resume_at = max(self.resume_at, now + float(retry_after))
+            except ValueError:
+                pass
+
+    async def wait(self) -> None:
+        """Sleeps (without blocking the event loop) only while the reported budget is exhausted."""
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            logger.info(f"Groq rate limit budget exhausted; waiting {delay:.1f}s for it to reset.")
+            await asyncio.sleep(delay)
+
+class AdaptiveConcurrencyLimit:
+    """
+    AIMD limit on concurrent Groq calls, TCP-style: halved when Groq answers 429, raised by one after a
+    full limit's worth of successful responses. Bursts then settle just under the account's rate limit
+    instead of piling into 429 retries. Shared by every stage and session (Groq's limits are per API key):
+    every call holds a `slot()`, and the in-flight count behind it is process-wide, across the event loops
+    of all Streamlit script threads.
+    """
+    def __init__(self, initial: int, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = min(max(1, initial), self.maximum)
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._waiters: "deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]" = deque()
+        self._lock = threading.Lock() # Response hooks and other sessions' event loops run on other threads
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one of the `limit` concurrent call slots, waiting (without blocking the event loop) for one to free up."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                raise
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # Wake everyone; each re-checks in_flight against the current limit (like Condition.notify_all)
+        with self._lock:
+            waiters, self._waiters = self._waiters, deque()
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+            except RuntimeError: # That session's loop has already closed
+                pass
+
+    def update(self, status_code: int) -> None:
+        raised = False
+        with self._lock:
+            if status_code == 429:
+                now = time.monotonic()
+                # The 429s of one burst arrive together: back off once for them, not once per response
+                if now - self._last_decrease >= 1.0:
+                    self._last_decrease = now
+                    self.limit = max(1, self.limit // 2)
+                    logger.info(f"Groq returned 429; concurrent LLM calls limited to {self.limit}.")
+                self._successes = 0
+            elif status_code < 400:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self._successes = 0
+                    self.limit += 1
+                    raised = True
+        if raised:
+            self._wake_waiters()
+
+def _resolve_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+groq_rate_limiter = GroqRateLimiter()
+groq_concurrency_limit = AdaptiveConcurrencyLimit(config.MAX_PARALLEL_ATTRIBUTES, config.LLM_MAX_CONCURRENCY)
+
+def _record_rate_limits(response: httpx.Response) -> None:
+    groq_rate_limiter.update(response.status_code, response.headers)
+    groq_concurrency_limit.update(response.status_code)
+
+async def _arecord_rate_limits(response: httpx.Response) -> None:
+    groq_rate_limiter.update(response.status_code, response.headers)
+    groq_concurrency_limit.update(response.status_code)
 
 # --- Initialize LLM ---
 @logger.catch(reraise=True) # Keep catch for unexpected errors during init
@@ -28,14 +174,36 @@ def initialize_llm():
         raise ValueError("GROQ_API_KEY is not set in the environment variables.")
 
     try:
+        # One keep-alive connection pool per client, reused by every extraction call
+        # (instead of a TLS handshake per request); the async one serves ainvoke/astream.
+        limits = httpx.Limits(
+            max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+        )
+        # HTTP/2 lets the concurrent extraction calls share one multiplexed TLS connection
+        use_http2 = config.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if config.LLM_HTTP2 and not use_http2:
+            logger.warning("LLM_HTTP2 is enabled but the 'h2' package is missing (pip install 'httpx[http2]'); using HTTP/1.1.")
         llm = ChatGroq(
             temperature=config.LLM_TEMPERATURE,
             groq_api_key=config.GROQ_API_KEY,
             model_name=config.LLM_MODEL_NAME,
-            max_tokens=config.LLM_MAX_OUTPUT_TOKENS
+            max_tokens=config.LLM_MAX_OUTPUT_TOKENS,
+            max_retries=config.LLM_MAX_RETRIES, # Concurrent calls back off on rate limits instead of failing
+            # Every response (including retried 429s) feeds its rate-limit headers to groq_rate_limiter
+            http_client=httpx.Client(limits=limits, timeout=config.LLM_HTTP_TIMEOUT, http2=use_http2,
+                                     event_hooks={"response": [_record_rate_limits]}),
+            http_async_client=httpx.AsyncClient(limits=limits, timeout=config.LLM_HTTP_TIMEOUT, http2=use_http2,
+                                                event_hooks={"response": [_arecord_rate_limits]}),
         )
         # logger.info(f"Groq LLM initialized with model: {config.LLM_MODEL_NAME}") # Remove internal logging
-        return llm
+        # The model, max_tokens and extra request parameters (e.g. response_format) can be overridden per call
+        # through the run config ({"configurable": {"model_name": ..., "max_tokens": n, "model_kwargs": {...}}})
+        return llm.configurable_fields(
+            model_name=ConfigurableField(id="model_name", name="Model"),
+            max_tokens=ConfigurableField(id="max_tokens", name="Max output tokens"),
+            model_kwargs=ConfigurableField(id="model_kwargs", name="Extra request parameters"),
+        )
     except Exception as e:
         # logger.error(f"Failed to initialize Groq LLM: {e}") # Remove internal logging
         # Re-raise a more specific error if needed, or let @logger.catch handle it
@@ -43,19 +211,16 @@ def initialize_llm():
 
 # --- Option 1: Using LangChain's Groq Integration (Recommended) ---
 
+def _format_doc(i: int, doc: Document) -> str:
+    metadata = doc.metadata
+    start_index = metadata.get('start_index')
+    chunk_info = f"Chunk {i}" if start_index is None else f"Chunk {i} (starts at char {start_index})"
+    return f"{chunk_info} from '{metadata.get('source', 'Unknown')}' (Page {metadata.get('page', 'N/A')}):\\n{doc.page_content}"
+
 def format_docs(docs: List[Document]) -> str:
     """Formats retrieved documents into a string for the prompt."""
     # Keep detailed formatting as it might help LLM locate info in PDFs
-    context_parts = []
-    for i, doc in enumerate(docs):
-        source = doc.metadata.get('source', 'Unknown')
-        page = doc.metadata.get('page', 'N/A')
-        start_index = doc.metadata.get('start_index', None)
-        chunk_info = f"Chunk {i+1}" + (f" (starts at char {start_index})" if start_index is not None else "")
-        context_parts.append(
-            f"{chunk_info} from '{source}' (Page {page}):\\n{doc.page_content}"
-        )
-    return "\\n\\n---\\n\\n".join(context_parts)
+    return "\\n\\n---\\n\\n".join([_format_doc(i, doc) for i, doc in enumerate(docs, start=1)])
 
 @logger.catch(reraise=True)
 def get_answer_from_llm_langchain(question: str, retriever: VectorStoreRetriever) -> Optional[str]:
@@ -215,8 +380,7 @@ WEBSITE_CONFIGS = [
             "    if (expandButton && expandButton.getAttribute('aria-selected') === 'false') {"
             "        console.log('Features expand button indicates collapsed state, clicking...');"
             "        expandButton.click();"
-            "        await new Promise(r => setTimeout(r, 1500));"
-            "        console.log('Expand button clicked and waited.');"
+            "        console.log('Expand button clicked.');"
             "    } else if (expandButton) {"
             "        console.log('Features expand button already indicates expanded state.');"
             "    } else {"
@@ -229,6 +393,12 @@ WEBSITE_CONFIGS = [
             "    }"
             "})();"
         ),
+        # Page-ready condition checked after the JS runs (instead of a fixed sleep after the click):
+        # the feature rows are rendered, or there is no expander to wait for
+        "wait_for": (
+            "js:() => document.querySelector('#pdp-features-tabpanel li.product-feature') !== null"
+            " || document.querySelector('#pdp-features-expander-btn') === null"
+        ),
         # Selector for the main container holding the features/specifications table
         "table_selector": "#pdp-features-tabpanel", # Example selector - VERIFY!
         "part_number_pattern": r"^\d{7}-\d$"  # Pattern for TE part numbers like 2330171-2
@@ -237,6 +407,7 @@ WEBSITE_CONFIGS = [
         "name": "Molex",
         "base_url_template": "https://www.molex.com/en-us/products/part-detail/{part_number}#part-details",
         "pre_extraction_js": None,  # No JS interaction needed for Molex
+        "wait_for": None,
         "table_selector": "body",  # Get the entire page content
         "part_number_pattern": r"^\d{9}$"  # Pattern for Molex part numbers like 988211060
     },
@@ -244,6 +415,7 @@ WEBSITE_CONFIGS = [
         "name": "TraceParts",
         "base_url_template": "https://www.traceparts.com/en/search?CatalogPath=&KeepFilters=true&Keywords={part_number}&SearchAction=Keywords",
         "pre_extraction_js": None, # Assuming no interaction needed for TraceParts search results page
+        "wait_for": None,
         # Selector for the table or div containing technical data on TraceParts
         "table_selector": ".technical-data", # Example selector - VERIFY!
         "part_number_pattern": None  # No specific pattern for TraceParts
@@ -252,6 +424,35 @@ WEBSITE_CONFIGS = [
 ]
 
 # --- HTML Cleaning Function ---
+# lxml's C parser is several times faster than the pure-Python html.parser on product pages (crawl4ai installs it)
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+# Selectors are module constants so soupsieve compiles each one once (it caches by pattern string)
+TE_FEATURE_ITEM_SELECTOR = "li.product-feature"
+TE_FEATURE_PANEL_ITEM_SELECTOR = "#pdp-features-tabpanel li.product-feature"
+TE_FEATURE_TITLE_SELECTOR = "span.feature-title"
+TE_FEATURE_VALUE_SELECTOR = "em.feature-value"
+MOLEX_SECTION_OR_ROW_SELECTOR = "h2, h3, h4, table tr"
+
+# Where each site's specification markup starts. Oversized HTML is cut to a window from the first marker
+# before parsing, since parse time grows with the input size. Molex has no spec-specific container (its first
+# <table> can be a nav or footer table ahead of the spec headings), so its pages are always parsed whole.
+SPEC_HTML_MARKERS = {
+    "TE Connectivity": ("product-feature",),
+}
+SPEC_HTML_LEAD_CHARS = 2000 # Kept before the marker (the section heading right above a table, the opening tags)
+
+def _slice_to_specs(html_content: str, site_name: str) -> str:
+    """Bounds HTML longer than SCRAPED_HTML_MAX_CHARS to a window starting just before the site's first spec marker."""
+    if len(html_content) <= config.SCRAPED_HTML_MAX_CHARS:
+        return html_content
+    positions = [position for position in (html_content.find(marker) for marker in SPEC_HTML_MARKERS.get(site_name, ())) if position >= 0]
+    if not positions:
+        return html_content
+    start = max(0, min(positions) - SPEC_HTML_LEAD_CHARS)
+    logger.debug(f"Parsing {config.SCRAPED_HTML_MAX_CHARS} of {len(html_content)} HTML chars from {site_name}, from offset {start}.")
+    return html_content[start:start + config.SCRAPED_HTML_MAX_CHARS]
+
 def clean_scraped_html(html_content: str, site_name: str) -> Optional[str]:
     """
     Parses scraped HTML using BeautifulSoup and extracts key-value pairs
@@ -268,24 +469,22 @@ def clean_scraped_html(html_content: str, site_name: str) -> Optional[str]:
         return None
 
     logger.debug(f"Cleaning HTML content from {site_name}...")
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = BeautifulSoup(_slice_to_specs(html_content, site_name), HTML_PARSER)
     extracted_texts = []
 
     try:
         # --- Add site-specific parsing logic here --- 
         if site_name == "TE Connectivity":
             # Find all feature list items within the main panel
-            feature_items = soup.find_all('li', class_='product-feature')
+            feature_items = soup.select(TE_FEATURE_ITEM_SELECTOR)
             if not feature_items:
                  # Maybe the main selector was wrong? Try finding the panel first
-                 panel = soup.find(id='pdp-features-tabpanel')
-                 if panel:
-                      feature_items = panel.find_all('li', class_='product-feature')
+                 feature_items = soup.select(TE_FEATURE_PANEL_ITEM_SELECTOR)
                  
             if feature_items:
                 for item in feature_items:
-                    title_span = item.find('span', class_='feature-title')
-                    value_em = item.find('em', class_='feature-value')
+                    title_span = item.select_one(TE_FEATURE_TITLE_SELECTOR)
+                    value_em = item.select_one(TE_FEATURE_VALUE_SELECTOR)
                     if title_span and value_em:
                         title = title_span.get_text(strip=True).replace(':', '').strip()
                         value = value_em.get_text(strip=True)
@@ -296,52 +495,41 @@ def clean_scraped_html(html_content: str, site_name: str) -> Optional[str]:
                  logger.warning(f"Could not find 'li.product-feature' items in the TE Connectivity HTML provided.")
 
         elif site_name == "Molex":
-            # Find all tables in the page
-            tables = soup.find_all('table')
-            for table in tables:
-                # Get section title if available (look for nearest h4 before the table)
-                section_title = "General"
-                prev_element = table.find_previous(['h4', 'h3', 'h2'])
-                if prev_element:
-                    section_title = prev_element.get_text(strip=True)
-
-                # Process all rows in the table
-                rows = table.find_all('tr')
-                for row in rows:
-                    # Get header and data cells
-                    headers = row.find_all('th')
-                    data_cells = row.find_all('td')
-                    
-                    # Handle both single and double-column layouts
-                    for i in range(0, len(headers), 2):
-                        if i < len(headers):
-                            label = headers[i].get_text(strip=True).replace(':', '').strip()
-                            if i < len(data_cells):
-                                value = data_cells[i].get_text(strip=True)
-                                if label and value:
-                                    extracted_texts.append(f"{section_title} - {label}: {value}")
-                            
-                            # Check for second column if it exists
-                            if i + 1 < len(headers) and i + 1 < len(data_cells):
-                                label2 = headers[i + 1].get_text(strip=True).replace(':', '').strip()
-                                value2 = data_cells[i + 1].get_text(strip=True)
-                                if label2 and value2:
-                                    extracted_texts.append(f"{section_title} - {label2}: {value2}")
+            # One document-order walk over headings and table rows: the section title is simply the last
+            # heading passed, instead of a find_previous() scan back through the page for every table
+            section_title = "General"
+            for element in soup.select(MOLEX_SECTION_OR_ROW_SELECTOR):
+                if element.name != 'tr':
+                    section_title = element.get_text(strip=True) or section_title
+                    continue
+
+                # Get header and data cells (one pass over the row), paired column by column
+                # (covers both single and double-column layouts)
+                cells = element.find_all(['th', 'td'])
+                headers = [cell for cell in cells if cell.name == 'th']
+                data_cells = [cell for cell in cells if cell.name == 'td']
+                for header, data_cell in zip(headers, data_cells):
+                    label = header.get_text(strip=True).replace(':', '').strip()
+                    value = data_cell.get_text(strip=True)
+                    if label and value:
+                        extracted_texts.append(f"{section_title} - {label}: {value}")
 
             if extracted_texts:
                 logger.info(f"Extracted {len(extracted_texts)} specifications from Molex HTML.")
             else:
                 logger.warning("No specifications found in Molex HTML tables.")
-                # Try to find any key-value pairs in the page
+                # Try to find any key-value pairs in the page. Only innermost blocks are read: an outer div's
+                # text repeats all of its children's, which made this pass quadratic and flooded it with duplicates.
+                seen_pairs = set()
                 for element in soup.find_all(['div', 'p', 'span']):
+                    if element.name != 'span' and element.find(['div', 'p']) is not None:
+                        continue
                     text = element.get_text(strip=True)
                     if ':' in text:
-                        parts = text.split(':', 1)
-                        if len(parts) == 2:
-                            label = parts[0].strip()
-                            value = parts[1].strip()
-                            if label and value:
-                                extracted_texts.append(f"{label}: {value}")
+                        label, value = (part.strip() for part in text.split(':', 1))
+                        if label and value and (label, value) not in seen_pairs:
+                            seen_pairs.add((label, value))
+                            extracted_texts.append(f"{label}: {value}")
 
         elif site_name == "TraceParts":
             # Add parsing logic specific to TraceParts HTML structure here
@@ -375,93 +563,126 @@ def clean_scraped_html(html_content: str, site_name: str) -> Optional[str]:
         return None # Return None on parsing error
 
 # --- Web Scraping Function (Revised to call cleaner) ---
-async def scrape_website_table_html(part_number: str) -> Optional[str]:
+# Part number patterns compiled once, in order of preference
+_SITE_PART_NUMBER_PATTERNS = [
+    (re.compile(site_config["part_number_pattern"]), site_config)
+    for site_config in WEBSITE_CONFIGS if site_config.get("part_number_pattern")
+]
+_SITE_RUN_CONFIGS: Dict[str, CrawlerRunConfig] = {} # Site name -> run config, built on first use (the settings never vary per call)
+
+def _sites_for_part_number(part_number: str) -> List[dict]:
+    """The site whose part number pattern matches, else every configured site in order of preference."""
+    for pattern, site_config in _SITE_PART_NUMBER_PATTERNS:
+        if pattern.match(part_number):
+            return [site_config]
+    return WEBSITE_CONFIGS
+
+def _site_url(site_config: dict, part_number: str) -> str:
+    # Plain substitution: str.format would also choke on a part number containing braces
+    return site_config["base_url_template"].replace("{part_number}", part_number)
+
+def _site_run_config(site_config: dict) -> CrawlerRunConfig:
+    """Crawler run settings for one site: its pre-extraction JS and readiness check, and the table's outer HTML."""
+    run_config = _SITE_RUN_CONFIGS.get(site_config["name"])
+    if run_config is not None:
+        return run_config
+
+    js_code = site_config.get("pre_extraction_js")
+    # Configure crawler run - Use JsonCssExtractionStrategy to get outerHTML
+    extraction_schema = {
+        "name": "TableHTML",
+        "baseSelector": "html", # Apply to whole document
+        "fields": [
+            # Try type: "html" to get the inner/outer HTML of the element
+            {"name": "html_content", "selector": site_config["table_selector"], "type": "html"}
+        ]
+    }
+    run_config = CrawlerRunConfig(
+             cache_mode=CacheMode.BYPASS,
+             js_code=[js_code] if js_code else None,
+             wait_for=site_config.get("wait_for"),
+             page_timeout=20000,
+             verbose=False, # Set to True for detailed crawl4ai logs
+             extraction_strategy=JsonCssExtractionStrategy(extraction_schema) # Add strategy
+        )
+    _SITE_RUN_CONFIGS[site_config["name"]] = run_config
+    return run_config
+
+def _cleaned_text_from_result(result, site_config: dict, target_url: str) -> Optional[str]:
+    """Pulls the table HTML out of a crawl result and cleans it; None (after logging why) if that fails."""
+    selector = site_config["table_selector"]
+    site_name = site_config.get("name", "Unknown Site")
+
+    # Check for success and extracted content from the strategy
+    if result.success and result.extracted_content:
+        raw_html = None
+        try:
+            extracted_data_list = orjson.loads(result.extracted_content)
+            if extracted_data_list and isinstance(extracted_data_list, list) and len(extracted_data_list) > 0:
+                first_item = extracted_data_list[0]
+                if isinstance(first_item, dict) and "html_content" in first_item:
+                    raw_html = str(first_item["html_content"]).strip()
+            else:
+                logger.debug(f"Extraction strategy did not find or extract HTML for selector '{selector}' on {site_name}.")
+
+        except orjson.JSONDecodeError:
+             logger.warning(f"Failed to parse JSON from crawl4ai extraction result for table HTML on {site_name}: {result.extracted_content[:100]}...")
+        except Exception as parse_error:
+             logger.error(f"Error processing extracted JSON for {site_name}: {parse_error}", exc_info=True)
+
+        # --- Pass raw HTML to cleaner --- 
+        if raw_html:
+            cleaned_text = clean_scraped_html(raw_html, site_name)
+            if cleaned_text:
+                logger.success(f"Successfully scraped and cleaned features table from {site_name}.")
+                return cleaned_text # Return the cleaned text
+            else:
+                 logger.warning(f"HTML was scraped from {site_name}, but cleaning failed or yielded no text.")
+        # else: (already logged failure to extract HTML)
+
+    elif result.error_message:
+         logger.warning(f"Scraping page failed for {site_name} ({target_url}): {result.error_message}")
+    else:
+        logger.debug(f"Scraping attempt for {site_name} yielded no extracted content or error message.")
+    return None
+
+def _scrape_dispatcher() -> MemoryAdaptiveDispatcher:
     """
-    Attempts to scrape the outer HTML of a features table, then cleans it.
+    Dispatcher shared by every crawl of one batch lookup: opens pages in parallel while system memory allows
+    (up to SCRAPE_CONCURRENCY per arun_many call) and backs off per domain when a supplier site answers 429/503.
     """
-    if not part_number:
-        logger.debug("Web scraping skipped: No part number provided.")
-        return None
+    return MemoryAdaptiveDispatcher(
+        memory_threshold_percent=config.SCRAPE_MEMORY_THRESHOLD_PERCENT,
+        max_session_permit=max(1, config.SCRAPE_CONCURRENCY),
+        rate_limiter=RateLimiter(base_delay=(1.0, 3.0), max_delay=30.0, max_retries=2, rate_limit_codes=[429, 503]),
+    )
 
+async def _scrape_part_number(
+    crawler: AsyncWebCrawler, part_number: str, dispatcher: Optional[MemoryAdaptiveDispatcher] = None
+) -> Optional[str]:
+    """
+    Attempts to scrape the outer HTML of a features table with an already started crawler, then cleans it.
+    A batch lookup passes its dispatcher so its rate limiting and memory gate cover this crawl too.
+    """
     logger.info(f"Attempting web scrape for features table / Part#: '{part_number}'...")
 
-    # Find the appropriate site configuration based on part number pattern
-    matching_site = None
-    for site_config in WEBSITE_CONFIGS:
-        pattern = site_config.get("part_number_pattern")
-        if pattern and re.match(pattern, part_number):
-            matching_site = site_config
-            break
-
     # If no matching site found, try all sites in order
-    sites_to_try = [matching_site] if matching_site else WEBSITE_CONFIGS
-
-    for site_config in sites_to_try:
+    for site_config in _sites_for_part_number(part_number):
         selector = site_config.get("table_selector")
         site_name = site_config.get("name", "Unknown Site") # Get site name for cleaner
         if not selector:
              logger.warning(f"No table_selector defined for {site_name}. Skipping.")
              continue
 
-        target_url = site_config["base_url_template"].format(part_number=part_number)
-        js_code = site_config.get("pre_extraction_js")
+        target_url = _site_url(site_config, part_number)
         logger.debug(f"Attempting scrape on {site_name} ({target_url}) for table selector '{selector}'")
 
-        # Configure crawler run - Use JsonCssExtractionStrategy to get outerHTML
-        extraction_schema = {
-            "name": "TableHTML",
-            "baseSelector": "html", # Apply to whole document
-            "fields": [
-                # Try type: "html" to get the inner/outer HTML of the element
-                {"name": "html_content", "selector": selector, "type": "html"}
-            ]
-        }
-        run_config = CrawlerRunConfig(
-                 cache_mode=CacheMode.BYPASS,
-                 js_code=[js_code] if js_code else None,
-                 page_timeout=20000,
-                 verbose=False, # Set to True for detailed crawl4ai logs
-                 extraction_strategy=JsonCssExtractionStrategy(extraction_schema) # Add strategy
-            )
-        browser_config = BrowserConfig(verbose=False) # Headless default
-
         try:
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                # Pass the single run_config object
-                results = await crawler.arun_many(urls=[target_url], config=run_config)
-                result = results[0]
-
-                # Check for success and extracted content from the strategy
-                if result.success and result.extracted_content:
-                    raw_html = None
-                    try:
-                        extracted_data_list = json.loads(result.extracted_content)
-                        if extracted_data_list and isinstance(extracted_data_list, list) and len(extracted_data_list) > 0:
-                            first_item = extracted_data_list[0]
-                            if isinstance(first_item, dict) and "html_content" in first_item:
-                                raw_html = str(first_item["html_content"]).strip()
-                        else:
-                            logger.debug(f"Extraction strategy did not find or extract HTML for selector '{selector}' on {site_name}.")
-
-                    except json.JSONDecodeError:
-                         logger.warning(f"Failed to parse JSON from crawl4ai extraction result for table HTML on {site_name}: {result.extracted_content[:100]}...")
-                    except Exception as parse_error:
-                         logger.error(f"Error processing extracted JSON for {site_name}: {parse_error}", exc_info=True)
-
-                    # --- Pass raw HTML to cleaner --- 
-                    if raw_html:
-                        cleaned_text = clean_scraped_html(raw_html, site_name)
-                        if cleaned_text:
-                            logger.success(f"Successfully scraped and cleaned features table from {site_name}.")
-                            return cleaned_text # Return the cleaned text
-                        else:
-                             logger.warning(f"HTML was scraped from {site_name}, but cleaning failed or yielded no text.")
-                    # else: (already logged failure to extract HTML)
-
-                elif result.error_message:
-                     logger.warning(f"Scraping page failed for {site_name} ({target_url}): {result.error_message}")
-                else:
-                    logger.debug(f"Scraping attempt for {site_name} yielded no extracted content or error message.")
+            # Pass the single run_config object
+            results = await crawler.arun_many(urls=[target_url], config=_site_run_config(site_config), dispatcher=dispatcher)
+            cleaned_text = _cleaned_text_from_result(results[0], site_config, target_url)
+            if cleaned_text:
+                return cleaned_text
 
         except asyncio.TimeoutError:
              logger.warning(f"Scraping timed out for {site_name} ({target_url})")
@@ -471,22 +692,323 @@ async def scrape_website_table_html(part_number: str) -> Optional[str]:
     logger.info(f"Web scraping finished for features table. No usable cleaned text found across configured sites.")
     return None
 
+async def _scrape_site_batch(
+    crawler: AsyncWebCrawler, site_config: dict, part_numbers: List[str], dispatcher: MemoryAdaptiveDispatcher
+) -> Dict[str, Optional[str]]:
+    """
+    Scrapes several part numbers from one site in a single arun_many call, so the dispatcher
+    schedules the pages (memory-aware parallelism, per-domain rate limiting) instead of one call per part.
+    """
+    site_name = site_config.get("name", "Unknown Site")
+    part_by_url = {_site_url(site_config, part_number): part_number for part_number in part_numbers}
+    cleaned_by_part = dict.fromkeys(part_numbers)
+    logger.info(f"Attempting batch web scrape of {len(part_numbers)} part numbers on {site_name}...")
+    try:
+        results = await crawler.arun_many(urls=list(part_by_url), config=_site_run_config(site_config), dispatcher=dispatcher)
+    except Exception as e:
+        logger.error(f"Unexpected error during batch web scraping for {site_name}: {e}", exc_info=True)
+        return cleaned_by_part
+    for result in results:
+        part_number = part_by_url.get(result.url)
+        if part_number is not None:
+            cleaned_by_part[part_number] = _cleaned_text_from_result(result, site_config, result.url)
+    return cleaned_by_part
+
+# Cleaned scrape results shared by every session of this process: part number -> (time.monotonic() expiry, text).
+# Misses (None) are kept only briefly so a part that just went live on a supplier site isn't hidden for long.
+_SCRAPE_RESULTS: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+_SCRAPE_RESULTS_LOCK = threading.Lock() # Every session's script thread (each with its own event loop) reads and evicts
+_SCRAPES_IN_FLIGHT: Dict[str, asyncio.Task] = {} # Concurrent lookups of one part number share a single scrape
+
+@lru_cache(maxsize=None)
+def _scrape_disk_cache() -> Optional[diskcache.Cache]:
+    """Disk store of cleaned scrape results, shared across processes and restarts (None when disabled)."""
+    if not config.SCRAPE_CACHE_DIR:
+        return None
+    return diskcache.Cache(config.SCRAPE_CACHE_DIR, size_limit=config.SCRAPE_CACHE_DIR_SIZE_LIMIT)
+
+def _scrape_disk_cache_key(part_number: str) -> str:
+    # The cleaner's output is what's stored, so a change to the configured sites invalidates old entries
+    sites = [(site["name"], site["base_url_template"], site["table_selector"]) for site in WEBSITE_CONFIGS]
+    return hashlib.sha256(repr((sites, part_number)).encode()).hexdigest()
+
+def _cached_scrape_result(part_number: str) -> Tuple[bool, Optional[str]]:
+    """Returns (hit, cleaned text) from the in-process scrape cache, then the disk cache, dropping expired entries."""
+    with _SCRAPE_RESULTS_LOCK:
+        entry = _SCRAPE_RESULTS.get(part_number)
+        if entry is not None:
+            expires_at, cleaned_text = entry
+            if time.monotonic() < expires_at:
+                _SCRAPE_RESULTS.move_to_end(part_number)
+                return True, cleaned_text
+            _SCRAPE_RESULTS.pop(part_number, None)
+
+    disk_cache = _scrape_disk_cache()
+    cleaned_text = disk_cache.get(_scrape_disk_cache_key(part_number)) if disk_cache is not None else None
+    if cleaned_text is None:
+        return False, None
+    _store_scrape_result(part_number, cleaned_text, persist=False)
+    return True, cleaned_text
+
+def _store_scrape_result(part_number: str, cleaned_text: Optional[str], persist: bool = True) -> None:
+    ttl = config.SCRAPE_CACHE_TTL_SECONDS if cleaned_text else config.SCRAPE_CACHE_MISS_TTL_SECONDS
+    with _SCRAPE_RESULTS_LOCK:
+        _SCRAPE_RESULTS[part_number] = (time.monotonic() + ttl, cleaned_text)
+        _SCRAPE_RESULTS.move_to_end(part_number)
+        while len(_SCRAPE_RESULTS) > config.SCRAPE_CACHE_SIZE:
+            _SCRAPE_RESULTS.popitem(last=False) # Least recently used
+
+    disk_cache = _scrape_disk_cache()
+    if persist and cleaned_text and disk_cache is not None: # Misses stay in memory only
+        disk_cache.set(_scrape_disk_cache_key(part_number), cleaned_text, expire=config.SCRAPE_DISK_CACHE_TTL_SECONDS)
+
+async def _scrape_part_number_cached(
+    crawler: AsyncWebCrawler, part_number: str, dispatcher: Optional[MemoryAdaptiveDispatcher] = None
+) -> Optional[str]:
+    """_scrape_part_number behind the in-process cache, with one scrape per part number in flight."""
+    hit, cleaned_text = _cached_scrape_result(part_number)
+    if hit:
+        logger.info(f"Using cached web scrape for part number {part_number}.")
+        return cleaned_text
+
+    task = _SCRAPES_IN_FLIGHT.get(part_number)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        return await asyncio.shield(task) # Another caller is already scraping this part
+
+    task = asyncio.ensure_future(_scrape_part_number(crawler, part_number, dispatcher))
+    _SCRAPES_IN_FLIGHT[part_number] = task
+    try:
+        cleaned_text = await task
+    finally:
+        if _SCRAPES_IN_FLIGHT.get(part_number) is task:
+            del _SCRAPES_IN_FLIGHT[part_number]
+    _store_scrape_result(part_number, cleaned_text)
+    return cleaned_text
+
+async def _scrape_site_batch_cached(
+    crawler: AsyncWebCrawler, site_config: dict, part_numbers: List[str], dispatcher: MemoryAdaptiveDispatcher
+) -> Dict[str, Optional[str]]:
+    """
+    _scrape_site_batch with each part registered in _SCRAPES_IN_FLIGHT, so a concurrent lookup of one of
+    them waits for this batch instead of scraping it again (and parts already being scraped are awaited here).
+    """
+    loop = asyncio.get_running_loop()
+    already_in_flight = {}
+    owned = {}
+    for part_number in part_numbers: # No await before every part is registered
+        task = _SCRAPES_IN_FLIGHT.get(part_number)
+        if task is not None and task.get_loop() is loop:
+            already_in_flight[part_number] = task
+        else:
+            owned[part_number] = _SCRAPES_IN_FLIGHT[part_number] = loop.create_future()
+
+    cleaned_by_part = dict.fromkeys(owned)
+    try:
+        if owned:
+            cleaned_by_part = await _scrape_site_batch(crawler, site_config, list(owned), dispatcher)
+            for part_number, cleaned_text in cleaned_by_part.items():
+                _store_scrape_result(part_number, cleaned_text)
+    finally:
+        for part_number, future in owned.items():
+            if not future.done(): # Waiters get a miss if the batch was cancelled
+                future.set_result(cleaned_by_part.get(part_number))
+            if _SCRAPES_IN_FLIGHT.get(part_number) is future:
+                del _SCRAPES_IN_FLIGHT[part_number]
+
+    for part_number, task in already_in_flight.items():
+        cleaned_by_part[part_number] = await asyncio.shield(task)
+    return cleaned_by_part
 
-# --- PDF Extraction Chain (Using Retriever and Detailed Instructions) ---
-def create_pdf_extraction_chain(retriever, llm):
+async def scrape_website_table_html(part_number: str) -> Optional[str]:
     """
-    Creates a RAG chain that uses ONLY PDF context (via retriever)
-    and detailed instructions to answer an extraction task.
+    Attempts to scrape the outer HTML of a features table, then cleans it.
     """
-    if retriever is None or llm is None:
-        logger.error("Retriever or LLM is not initialized for PDF extraction chain.")
+    if not part_number:
+        logger.debug("Web scraping skipped: No part number provided.")
         return None
 
-    # Template using only PDF context and detailed instructions passed at runtime
-    template = """
-You are an expert data extractor. Your goal is to extract a specific piece of information based on the Extraction Instructions provided below, using ONLY the Document Context from PDFs.
+    hit, cleaned_text = _cached_scrape_result(part_number)
+    if hit: # No browser needed
+        logger.info(f"Using cached web scrape for part number {part_number}.")
+        return cleaned_text
 
-Part Number Information (if provided by user):
+    # One browser for every site tried: launching Chromium costs far more than opening another page in it
+    browser_config = BrowserConfig(verbose=False) # Headless default
+    async with AsyncWebCrawler(config=browser_config) as crawler:
+        return await _scrape_part_number_cached(crawler, part_number)
+
+async def scrape_website_tables_html(part_numbers: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Scrapes several part numbers concurrently in one shared browser.
+
+    Args:
+        part_numbers: Part numbers to look up (empty entries are skipped).
+
+    Returns:
+        A dict of part number -> cleaned features text (None where no site yielded data).
+    """
+    part_numbers = list(dict.fromkeys(p for p in part_numbers if p)) # Each part once, in input order
+    cleaned_by_part = {}
+    for part_number in part_numbers:
+        hit, cleaned_text = _cached_scrape_result(part_number)
+        if hit:
+            cleaned_by_part[part_number] = cleaned_text
+    to_scrape = [part_number for part_number in part_numbers if part_number not in cleaned_by_part]
+    if not to_scrape: # Everything cached (or nothing asked): no browser needed
+        return cleaned_by_part
+
+    # Parts whose pattern pins them to one site are fetched per site in one arun_many call; the rest walk
+    # the site fallback order individually (bounded: each holds a browser tab). One dispatcher covers all
+    # of it, so every crawl shares the same per-domain back-off and memory gate.
+    parts_by_site: Dict[str, List[str]] = {}
+    fallback_parts = []
+    for part_number in to_scrape:
+        sites = _sites_for_part_number(part_number)
+        if len(sites) == 1 and sites[0].get("table_selector"):
+            parts_by_site.setdefault(sites[0]["name"], []).append(part_number)
+        else:
+            fallback_parts.append(part_number)
+    sites_by_name = {site_config["name"]: site_config for site_config in WEBSITE_CONFIGS}
+
+    dispatcher = _scrape_dispatcher()
+    semaphore = asyncio.Semaphore(max(1, config.SCRAPE_CONCURRENCY))
+    browser_config = BrowserConfig(verbose=False) # Headless default
+    async with AsyncWebCrawler(config=browser_config) as crawler:
+        async def _scrape_one(part_number: str) -> Optional[str]:
+            async with semaphore:
+                return await _scrape_part_number_cached(crawler, part_number, dispatcher)
+
+        site_batches, cleaned_texts = await asyncio.gather(
+            asyncio.gather(*(
+                _scrape_site_batch_cached(crawler, sites_by_name[name], parts, dispatcher) for name, parts in parts_by_site.items()
+            )),
+            asyncio.gather(*(_scrape_one(part_number) for part_number in fallback_parts)),
+        )
+    for site_batch in site_batches:
+        cleaned_by_part.update(site_batch)
+    cleaned_by_part.update(zip(fallback_parts, cleaned_texts))
+    return {part_number: cleaned_by_part[part_number] for part_number in part_numbers}
+
+
+# --- Shared PDF Context (one retrieval for a whole batch of attributes) ---
+def _embed_queries(embeddings, queries: List[str]) -> List[List[float]]:
+    """
+    Query-side embeddings. embed_documents is for chunks only: asymmetric models (e5, bge, instructor)
+    encode queries with a different prefix/prompt, which embed_query applies.
+    """
+    return [embeddings.embed_query(query) for query in queries]
+
+def _per_attribute_context_docs(vector_store, attribute_keys: List[str], part_number: str) -> List[Document]:
+    """
+    Top PREFETCH_PER_ATTRIBUTE_K chunks for each attribute's own query, so attributes the combined query
+    ranks low still get their evidence into the shared context. The queries are embedded up front, then
+    the vector store is searched by vector.
+    """
+    queries = [f"{attribute_key} of part number {part_number}" for attribute_key in attribute_keys]
+    query_vectors = _embed_queries(vector_store.embeddings, queries)
+    docs = []
+    for query_vector in query_vectors:
+        docs.extend(vector_store.similarity_search_by_vector(query_vector, k=config.PREFETCH_PER_ATTRIBUTE_K))
+    return docs
+
+def prefetch_pdf_context(retriever, attribute_keys: List[str], part_number: str) -> Optional[str]:
+    """
+    Retrieves PDF context once for a batch of attributes so the PDF chain doesn't
+    query the vector store again for every attribute.
+
+    Args:
+        retriever: The configured vector store retriever.
+        attribute_keys: The attributes the context should cover.
+        part_number: Part number entered by the user (or "Not Provided").
+
+    Returns:
+        The formatted context string, or None if prefetching is disabled or nothing was retrieved.
+    """
+    if retriever is None or not attribute_keys or config.PREFETCH_CONTEXT_K <= 0:
+        return None
+
+    query = f"Extract information about {', '.join(attribute_keys)} for part number {part_number}"
+    try:
+        # Search the store directly: how a per-call k reaches the retriever's search_kwargs varies across langchain-core versions
+        vector_store = retriever.vectorstore
+        if config.RETRIEVER_SEARCH_TYPE == "mmr":
+            docs = vector_store.max_marginal_relevance_search(
+                query, k=config.PREFETCH_CONTEXT_K, fetch_k=max(config.RETRIEVER_FETCH_K, config.PREFETCH_CONTEXT_K),
+                lambda_mult=config.RETRIEVER_LAMBDA_MULT,
+            )
+        else:
+            docs = vector_store.similarity_search(query, k=config.PREFETCH_CONTEXT_K)
+        if config.PREFETCH_PER_ATTRIBUTE_K > 0:
+            docs += _per_attribute_context_docs(retriever.vectorstore, attribute_keys, part_number)
+    except Exception as e:
+        logger.warning(f"Context prefetch failed ({e}); PDF chain will retrieve per attribute.")
+        return None
+
+    # Drop repeated chunks (e.g. the same page indexed twice) so the prompt isn't padded with duplicates
+    unique_docs = []
+    seen_contents = set()
+    for doc in docs:
+        if doc.page_content not in seen_contents:
+            seen_contents.add(doc.page_content)
+            unique_docs.append(doc)
+
+    if not unique_docs:
+        logger.warning("Context prefetch returned no documents; PDF chain will retrieve per attribute.")
+        return None
+    logger.info(f"Prefetched {len(unique_docs)} context chunks shared by {len(attribute_keys)} attributes.")
+    return format_docs(unique_docs)
+
+def retrieve_pdf_contexts(retriever, attribute_keys: List[str], part_number: str) -> Dict[str, str]:
+    """
+    Per-attribute PDF context for when no shared context was prefetched: the same queries the PDF chain
+    would otherwise run one at a time, all embedded up front (query side) and the vector store searched by vector.
+
+    Args:
+        retriever: The configured vector store retriever.
+        attribute_keys: The attributes to retrieve context for.
+        part_number: Part number entered by the user (or "Not Provided").
+
+    Returns:
+        A dict of attribute key -> formatted context; empty if batched retrieval isn't possible
+        (the PDF chain then retrieves per attribute as before).
+    """
+    if retriever is None or not attribute_keys or retriever.search_type not in ("mmr", "similarity"):
+        return {}
+
+    vector_store = retriever.vectorstore
+    queries = [f"Extract information about {attribute_key} for part number {part_number}" for attribute_key in attribute_keys]
+    try:
+        query_vectors = _embed_queries(vector_store.embeddings, queries)
+        search_by_vector = (vector_store.max_marginal_relevance_search_by_vector if retriever.search_type == "mmr"
+                            else vector_store.similarity_search_by_vector)
+        contexts = {
+            attribute_key: format_docs(search_by_vector(query_vector, **retriever.search_kwargs))
+            for attribute_key, query_vector in zip(attribute_keys, query_vectors)
+        }
+    except Exception as e:
+        logger.warning(f"Batched context retrieval failed ({e}); PDF chain will retrieve per attribute.")
+        return {}
+    logger.info(f"Retrieved PDF context for {len(contexts)} attributes by vector search.")
+    return contexts
+
+# --- Extraction Prompt Templates (parsed once at import, shared by every chain) ---
+# Per-attribute prompts are split into a system message that is identical for every attribute and
+# every stage (role + answer format), and a human message carrying only what varies per call.
+# The shared prefix lets Groq reuse it across the ~25 requests of a run instead of re-reading it each time.
+EXTRACTION_SYSTEM_PROMPT = """You are an expert data extractor. Your goal is to extract one specific piece of information by applying the Extraction Instructions in the request to the context given in the request (Document Context from PDFs or Cleaned Scraped Website Data). Use ONLY that context.
+
+IMPORTANT: Respond with ONLY a single, valid JSON object containing exactly one key-value pair.
+- The key for the JSON object MUST be the attribute name given in the request.
+- The value MUST be the result obtained by applying the Extraction Instructions to the provided context.
+- Provide the value as a JSON string. Examples: "GF, T", "none", "NOT FOUND", "Female", "7.2", "999".
+- If the information cannot be determined from the provided context based on the instructions, the value MUST be "NOT FOUND".
+- Do NOT include any explanations, reasoning, or any text outside of the single JSON object in your response.
+
+Example Output Format:
+{"<attribute name>": "extracted_value"}"""
+
+# Human message using only PDF context and detailed instructions passed at runtime
+PDF_EXTRACTION_HUMAN_PROMPT = """Part Number Information (if provided by user):
 {part_number}
 
 --- Document Context (from PDFs) ---
@@ -496,24 +1018,96 @@ Part Number Information (if provided by user):
 Extraction Instructions:
 {extraction_instructions}
 
----
-IMPORTANT: Respond with ONLY a single, valid JSON object containing exactly one key-value pair.
-- The key for the JSON object MUST be the string: "{attribute_key}"
-- The value MUST be the extracted result determined by following the Extraction Instructions using the Document Context provided above.
-- Provide the value as a JSON string. Examples: "GF, T", "none", "NOT FOUND", "Female", "7.2", "999".
-- Do NOT include any explanations, reasoning, or any text outside of the single JSON object in your response.
+Attribute name (JSON key): "{attribute_key}"
+Output:"""
 
-Example Output Format:
-{{"{attribute_key}": "extracted_value_from_pdf"}}
+# Human message allowing reasoning based on web data and instructions
+WEB_EXTRACTION_HUMAN_PROMPT = """--- Cleaned Scraped Website Data ---
+{cleaned_web_data}
+--- End Cleaned Scraped Website Data ---
+
+Extraction Instructions:
+{extraction_instructions}
+
+Attribute name (JSON key): "{attribute_key}"
+Output:"""
+
+# The system text has no variables, so it is passed as a message (not a template) and its braces stay literal
+PDF_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=EXTRACTION_SYSTEM_PROMPT),
+    ("human", PDF_EXTRACTION_HUMAN_PROMPT),
+])
+WEB_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=EXTRACTION_SYSTEM_PROMPT),
+    ("human", WEB_EXTRACTION_HUMAN_PROMPT),
+])
+
+# Grouped variants: every pending attribute answered in one JSON object. Ordered static-first for
+# prefix caching: the fixed system rules, then the attribute instructions (the same on every run over
+# the same attribute set), and the per-document data last.
+GROUPED_EXTRACTION_SYSTEM_PROMPT = """You are an expert data extractor. Your goal is to extract several pieces of information, each described by its own Extraction Instructions in the request, using ONLY the context given at the end of the request (Document Context from PDFs or Cleaned Scraped Website Data).
+
+IMPORTANT: Follow each attribute's Extraction Instructions carefully using that context.
+Respond with ONLY a single, valid JSON object.
+- The keys MUST be exactly the attribute names listed in the request.
+- Each value MUST be the result of following that attribute's Extraction Instructions using the provided context, given as a JSON string.
+- If an attribute cannot be determined from the provided context, its value MUST be "NOT FOUND".
+- Do NOT include any explanations, reasoning, or any text outside of the single JSON object in your response."""
+
+PDF_GROUPED_EXTRACTION_HUMAN_PROMPT = """{attribute_instructions}
+
+Attribute names (JSON keys): {attribute_keys}
+
+Part Number Information (if provided by user):
+{part_number}
+
+--- Document Context (from PDFs) ---
+{context}
+--- End Document Context ---
+
+Output:"""
+
+WEB_GROUPED_EXTRACTION_HUMAN_PROMPT = """{attribute_instructions}
+
+Attribute names (JSON keys): {attribute_keys}
+
+--- Cleaned Scraped Website Data ---
+{cleaned_web_data}
+--- End Cleaned Scraped Website Data ---
+
+Output:"""
 
-Output:
-"""
-    prompt = PromptTemplate.from_template(template)
+PDF_GROUPED_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=GROUPED_EXTRACTION_SYSTEM_PROMPT),
+    ("human", PDF_GROUPED_EXTRACTION_HUMAN_PROMPT),
+])
+WEB_GROUPED_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=GROUPED_EXTRACTION_SYSTEM_PROMPT),
+    ("human", WEB_GROUPED_EXTRACTION_HUMAN_PROMPT),
+])
+
+# Fingerprint of the extraction prompt templates. Persistent extraction caches include it in their keys,
+# so editing a template invalidates answers produced with the old wording.
+EXTRACTION_PROMPTS_VERSION = hashlib.sha256("\0".join((
+    EXTRACTION_SYSTEM_PROMPT, PDF_EXTRACTION_HUMAN_PROMPT, WEB_EXTRACTION_HUMAN_PROMPT,
+    GROUPED_EXTRACTION_SYSTEM_PROMPT, PDF_GROUPED_EXTRACTION_HUMAN_PROMPT, WEB_GROUPED_EXTRACTION_HUMAN_PROMPT,
+)).encode()).hexdigest()[:16]
+
+# --- PDF Extraction Chain (Using Retriever and Detailed Instructions) ---
+def create_pdf_extraction_chain(retriever, llm):
+    """
+    Creates a RAG chain that uses ONLY PDF context (via retriever)
+    and detailed instructions to answer an extraction task.
+    """
+    if retriever is None or llm is None:
+        logger.error("Retriever or LLM is not initialized for PDF extraction chain.")
+        return None
 
     # Chain uses retriever to get PDF context
     pdf_chain = (
         RunnableParallel(
-            context=RunnablePassthrough() | (lambda x: retriever.invoke(f"Extract information about {x['attribute_key']} for part number {x.get('part_number', 'N/A')}")) | format_docs,
+            # Use the shared prefetched context when the caller supplies one, else retrieve per attribute
+            context=RunnablePassthrough() | (lambda x: x["context"] if x.get("context") else format_docs(retriever.invoke(f"Extract information about {x['attribute_key']} for part number {x.get('part_number', 'N/A')}"))),
             extraction_instructions=RunnablePassthrough(),
             attribute_key=RunnablePassthrough(),
             part_number=RunnablePassthrough()
@@ -523,9 +1117,8 @@ Output:
             attribute_key=lambda x: x['attribute_key']['attribute_key'],
             part_number=lambda x: x['part_number'].get('part_number', "Not Provided")
         )
-        | prompt
-        | llm
-        | StrOutputParser()
+        | PDF_EXTRACTION_PROMPT
+        | llm # The AIMessage is returned as is: _invoke_chain_and_process needs its finish_reason
     )
     logger.info("PDF Extraction RAG chain created successfully.")
     return pdf_chain
@@ -540,33 +1133,6 @@ def create_web_extraction_chain(llm):
         logger.error("LLM is not initialized for Web extraction chain.")
         return None
 
-    # Simplified template allowing reasoning based on web data and instructions
-    template = """
-You are an expert data extractor. Your goal is to answer a specific piece of information by applying the logic described in the 'Extraction Instructions' to the 'Cleaned Scraped Website Data' provided below. Use ONLY the provided website data as your context.
-
---- Cleaned Scraped Website Data ---
-{cleaned_web_data}
---- End Cleaned Scraped Website Data ---
-
-Extraction Instructions:
-{extraction_instructions}
-
----
-IMPORTANT: Follow the Extraction Instructions carefully using the website data.
-Respond with ONLY a single, valid JSON object containing exactly one key-value pair.
-- The key for the JSON object MUST be the string: "{attribute_key}"
-- The value MUST be the result obtained by applying the Extraction Instructions to the Cleaned Scraped Website Data.
-- Provide the value as a JSON string.
-- If the information cannot be determined from the Cleaned Scraped Website Data based on the instructions, the value MUST be "NOT FOUND".
-- Do NOT include any explanations or reasoning outside the JSON object.
-
-Example Output Format:
-{{"{attribute_key}": "extracted_value_based_on_instructions"}}
-
-Output:
-"""
-    prompt = PromptTemplate.from_template(template)
-
     # Chain structure similar to PDF chain to handle inputs
     web_chain = (
         RunnableParallel(
@@ -579,71 +1145,233 @@ Output:
             extraction_instructions=lambda x: x['extraction_instructions']['extraction_instructions'],
             attribute_key=lambda x: x['attribute_key']['attribute_key']
         )
-        | prompt
-        | llm
-        | StrOutputParser()
+        | WEB_EXTRACTION_PROMPT
+        | llm # The AIMessage is returned as is: _invoke_chain_and_process needs its finish_reason
     )
     logger.info("Web Data Extraction chain created successfully (accepts instructions).")
     return web_chain
 
+# --- Grouped PDF Extraction Chain (one request for many attributes) ---
+def create_pdf_grouped_extraction_chain(llm):
+    """
+    Creates a chain that answers all given attributes in a single LLM call over an
+    already-retrieved PDF context (see prefetch_pdf_context).
+    Expects: part_number, context, attribute_instructions, attribute_keys.
+    """
+    if llm is None:
+        logger.error("LLM is not initialized for grouped PDF extraction chain.")
+        return None
+
+    grouped_chain = PDF_GROUPED_EXTRACTION_PROMPT | llm
+    logger.info("Grouped PDF Extraction chain created successfully.")
+    return grouped_chain
+
+def create_web_grouped_extraction_chain(llm):
+    """
+    Creates a chain that answers all given attributes in a single LLM call over the cleaned web data.
+    Expects: cleaned_web_data, attribute_instructions, attribute_keys.
+    """
+    if llm is None:
+        logger.error("LLM is not initialized for grouped Web extraction chain.")
+        return None
+
+    grouped_chain = WEB_GROUPED_EXTRACTION_PROMPT | llm
+    logger.info("Grouped Web Extraction chain created successfully.")
+    return grouped_chain
+
 
 # --- Helper function to invoke chain and process response (KEEP THIS) ---
-async def _invoke_chain_and_process(chain, input_data, attribute_key):
-    """Helper to invoke chain, handle errors, and clean response."""
-    response = await chain.ainvoke(input_data)
-    log_msg = f"Chain invoked successfully for '{attribute_key}'."
+STREAM_UPDATE_INTERVAL_SECONDS = 0.3
+
+def partial_answer_value(partial_response: str, attribute_key: str) -> Optional[str]:
+    """
+    Best-effort value of `attribute_key` from a response that is still streaming, or None while
+    the model is still reasoning / the JSON object hasn't reached the value yet.
+    """
+    think_end = partial_response.rfind("</think>")
+    if "<think>" in partial_response and think_end == -1:
+        return None # Still inside the reasoning block
+    answer = partial_response[think_end + len("</think>"):] if think_end != -1 else partial_response
+    first_brace = answer.find("{")
+    if first_brace == -1:
+        return None
+    parsed = parse_partial_json(answer[first_brace:])
+    if not isinstance(parsed, dict) or parsed.get(attribute_key) is None:
+        return None
+    return str(parsed[attribute_key])
+
+async def _invoke_chain_and_process(chain, input_data, attribute_key, on_token=None, llm_overrides=None, log_label=None):
+    """
+    Helper to invoke chain, handle errors, and clean response.
+    attribute_key is the real key a bare answer line is wrapped under; log_label (default attribute_key)
+    only names the call in logs and error payloads.
+    If on_token is given, the response is streamed and on_token(partial_response)
+    is called (at most every STREAM_UPDATE_INTERVAL_SECONDS) as it grows.
+    llm_overrides, if given, sets the LLM's configurable fields for this call
+    (model_name, max_tokens, model_kwargs; see initialize_llm).
+    """
+    log_label = log_label or attribute_key
+    run_config = {"configurable": llm_overrides} if llm_overrides else None
+    if on_token is None:
+        message = await chain.ainvoke(input_data, config=run_config)
+        response = message.content if message is not None else None
+        finish_reason = message.response_metadata.get("finish_reason") if message is not None else None
+    else:
+        response_parts = []
+        finish_reason = None
+        last_update = 0.0
+        async for chunk in chain.astream(input_data, config=run_config):
+            response_parts.append(chunk.content)
+            finish_reason = chunk.response_metadata.get("finish_reason") or finish_reason # Set on the last chunk
+            now = time.monotonic()
+            if now - last_update >= STREAM_UPDATE_INTERVAL_SECONDS:
+                on_token("".join(response_parts))
+                last_update = now
+        response = "".join(response_parts)
+    log_msg = f"Chain invoked successfully for '{log_label}'."
     # Add response length to log for debugging potential truncation/verboseness
     if response:
          log_msg += f" Response length: {len(response)}"
     logger.info(log_msg)
 
     if response is None:
-         logger.error(f"Chain invocation returned None for '{attribute_key}'")
-         return json.dumps({"error": f"Chain invocation returned None for {attribute_key}"})
-
-    # --- Enhanced Cleaning --- 
-    cleaned_response = response
-    
-    # 1. Remove <think> tags (already handled)
-    think_start_tag = "<think>"
-    think_end_tag = "</think>"
-    start_index_think = cleaned_response.find(think_start_tag)
-    end_index_think = cleaned_response.find(think_end_tag)
-    if start_index_think != -1 and end_index_think != -1 and end_index_think > start_index_think:
-         cleaned_response = cleaned_response[end_index_think + len(think_end_tag):].strip()
-
-    # 2. Remove ```json ... ``` markdown (already handled)
-    if cleaned_response.strip().startswith("```json"):
-        cleaned_response = cleaned_response.strip()[7:]
-        if cleaned_response.endswith("```"):
-            cleaned_response = cleaned_response[:-3]
-        cleaned_response = cleaned_response.strip()
-
-    # 3. Find the first '{' and the last '}' to isolate the JSON object
-    try:
-        first_brace = cleaned_response.find('{')
-        last_brace = cleaned_response.rfind('}')
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            potential_json = cleaned_response[first_brace : last_brace + 1]
-            # Attempt to parse the isolated part
-            json.loads(potential_json) # Test if it's valid JSON
-            cleaned_response = potential_json # If valid, use this isolated part
-            logger.debug(f"Isolated potential JSON for '{attribute_key}': {cleaned_response}")
-        else:
-             logger.warning(f"Could not find clear JSON braces {{...}} in response for '{attribute_key}'. Using original cleaned response.")
-    except json.JSONDecodeError:
-        logger.warning(f"Failed to parse isolated JSON for '{attribute_key}'. Using original cleaned response. Raw: {cleaned_response}")
-        # If parsing the isolated part fails, fall back to the previously cleaned response
-        pass 
-    except Exception as e:
-         logger.error(f"Unexpected error during JSON isolation for '{attribute_key}': {e}")
-         # Fallback
-         pass
-    # --- End Enhanced Cleaning ---
+         logger.error(f"Chain invocation returned None for '{log_label}'")
+         return orjson.dumps({"error": f"Chain invocation returned None for {log_label}"}).decode()
 
+    if finish_reason == "length":
+        logger.warning(f"Response for '{log_label}' hit the output token cap (finish_reason=length).")
+    cleaned_response = clean_chain_response(response, attribute_key, truncated=finish_reason == "length")
+    logger.debug(f"Cleaned response for '{log_label}': {cleaned_response}")
     return cleaned_response # Validation happens in the caller (app.py now)
 
 
+# --- Concurrent invocation of one extraction stage ---
+async def invoke_chain_concurrently(chain, inputs_by_attribute: Dict[str, dict], stage_label: str, on_result=None, on_progress=None,
+                                    llm_overrides_by_attribute: Optional[Dict[str, dict]] = None) -> Dict[str, tuple]:
+    """
+    Invokes the chain for every attribute concurrently instead of one after another.
+
+    Args:
+        chain: The extraction chain (web or PDF) to invoke.
+        inputs_by_attribute: Mapping of attribute key -> chain input dict.
+        stage_label: Label used in logs and error payloads (e.g. "Stage 1 (Web)").
+        on_result: Optional callback(attribute_key, json_result_str, run_time) called as each attribute finishes.
+        on_progress: Optional callback(attribute_key, partial_response). When given, responses are streamed.
+        llm_overrides_by_attribute: Optional per-attribute LLM settings, e.g. {"max_tokens": n, "model_name": ...}
+            (others use the LLM's defaults).
+
+    Returns:
+        A dict of attribute key -> (json_result_str, run_time_seconds).
+    """
+    # Bound in-flight requests so a burst of attributes doesn't trip the Groq rate limit. The bound is the
+    # adaptive groq_concurrency_limit (starts at MAX_PARALLEL_ATTRIBUTES), shared with every other stage and session.
+    async def _run_one(attribute_key, input_data):
+        async with groq_concurrency_limit.slot():
+            await groq_rate_limiter.wait()
+            start_ns = time.perf_counter_ns()
+            try:
+                on_token = (lambda partial: on_progress(attribute_key, partial)) if on_progress else None
+                json_result_str = await _invoke_chain_and_process(
+                    chain, input_data, attribute_key, on_token=on_token,
+                    llm_overrides=dict((llm_overrides_by_attribute or {}).get(attribute_key, {})),
+                    log_label=f"{attribute_key} ({stage_label})"
+                )
+            except Exception as e:
+                # Keep one failing attribute from poisoning the rest of the batch
+                logger.error(f"Error during {stage_label} call for '{attribute_key}': {e}", exc_info=True)
+                json_result_str = orjson.dumps({"error": f"Exception during {stage_label} call: {e}"}).decode()
+            run_time = (time.perf_counter_ns() - start_ns) / 1e9
+            return attribute_key, json_result_str, run_time
+
+    # Dispatch short-instruction attributes first: simple yes/no or lookup answers come back in well under
+    # a second while long reasoning chains take several, so the semaphore fills the UI with quick answers early.
+    # Instruction length is the cost estimate; the sort is stable, so ties keep attribute order.
+    dispatch_order = sorted(inputs_by_attribute.items(), key=lambda item: len(item[1].get("extraction_instructions", "")))
+    tasks = [asyncio.create_task(_run_one(key, data)) for key, data in dispatch_order]
+    results = {}
+    for finished in asyncio.as_completed(tasks):
+        attribute_key, json_result_str, run_time = await finished
+        results[attribute_key] = (json_result_str, run_time)
+        if on_result:
+            on_result(attribute_key, json_result_str, run_time)
+    # One summary line per stage instead of one log call per attribute
+    logger.info("{} timings (ms): {}", stage_label, {key: round(run_time * 1000) for key, (_, run_time) in results.items()})
+    return results
+
+
+@lru_cache(maxsize=8)
+def grouped_extraction_schema(attribute_keys: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Pydantic model for a grouped answer: one optional string field per attribute, aliased to the
+    attribute's display name. Built once per attribute set; numbers/booleans are coerced to strings
+    and unknown keys are ignored.
+    """
+    fields = {
+        f"attribute_{i}": (Annotated[Optional[str], BeforeValidator(lambda v: None if v is None else str(v))], Field(default=None, alias=key))
+        for i, key in enumerate(attribute_keys)
+    }
+    return create_model("GroupedExtraction", __config__=ConfigDict(extra="ignore"), **fields)
+
+@lru_cache(maxsize=8)
+def grouped_extraction_json_schema(attribute_keys: Tuple[str, ...]) -> dict:
+    """JSON schema of grouped_extraction_schema(attribute_keys), keyed by the attributes' display names."""
+    return grouped_extraction_schema(attribute_keys).model_json_schema(by_alias=True)
+
+async def invoke_grouped_extraction(chain, shared_inputs: Dict[str, str], instructions_by_attribute: Dict[str, str]) -> Dict[str, str]:
+    """
+    Asks for every attribute in one request instead of one request per attribute.
+
+    Args:
+        chain: A grouped extraction chain (PDF or web).
+        shared_inputs: The chain's other inputs, shared by all attributes
+            (PDF: part_number and context; web: cleaned_web_data).
+        instructions_by_attribute: Mapping of attribute key -> extraction instructions.
+
+    Returns:
+        A dict of attribute key -> extracted value for the attributes the model actually answered.
+        Missing, empty and "NOT FOUND" values are left out so the caller can retry them one by one.
+    """
+    attribute_instructions = "\n\n".join(
+        f"--- Extraction Instructions for \"{key}\" ---\n{instructions}"
+        for key, instructions in instructions_by_attribute.items()
+    )
+    input_data = {
+        **shared_inputs,
+        "attribute_instructions": attribute_instructions,
+        "attribute_keys": ", ".join(f'"{key}"' for key in instructions_by_attribute),
+    }
+    schema = grouped_extraction_schema(tuple(instructions_by_attribute))
+    llm_overrides = {}
+    if config.GROUPED_LLM_MODEL_NAME != config.LLM_MODEL_NAME:
+        llm_overrides["model_name"] = config.GROUPED_LLM_MODEL_NAME
+    if config.GROUPED_RESPONSE_FORMAT == "json_object":
+        llm_overrides["model_kwargs"] = {"response_format": {"type": "json_object"}}
+    elif config.GROUPED_RESPONSE_FORMAT == "json_schema":
+        # The answer's shape (one optional string per attribute, keyed by display name) as a JSON schema,
+        # so the decoder can't add, rename or drop keys; the instructions stay as prose in the prompt
+        llm_overrides["model_kwargs"] = {"response_format": {"type": "json_schema", "json_schema": {
+            "name": "grouped_extraction", "schema": grouped_extraction_json_schema(tuple(instructions_by_attribute)),
+        }}}
+    try:
+        async with groq_concurrency_limit.slot():
+            await groq_rate_limiter.wait()
+            # No single attribute key here: a bare-line answer isn't a grouped object and fails validation below
+            json_result_str = await _invoke_chain_and_process(
+                chain, input_data, "", llm_overrides=llm_overrides,
+                log_label=f"{len(instructions_by_attribute)} attributes (grouped)"
+            )
+        values = schema.model_validate_json(json_result_str).model_dump(by_alias=True)
+    except Exception as e: # Includes pydantic.ValidationError for non-object / malformed JSON
+        logger.warning(f"Grouped extraction failed, falling back to per-attribute calls: {e}")
+        return {}
+
+    answered = {
+        key: value for key, value in values.items()
+        if value is not None and value.strip() and "not found" not in value.lower()
+    }
+    logger.info(f"Grouped extraction answered {len(answered)} of {len(instructions_by_attribute)} attributes.")
+    return answered
+
 # --- REMOVE Unified Chain and Old run_extraction ---
 # def create_extraction_chain(retriever, llm): ...
 # @logger.catch(reraise=True)
@@ -4,6 +4,8 @@ import re
 import base64
 import io
 import asyncio
+import random
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, BinaryIO, Optional, Dict, Any
 from loguru import logger
@@ -18,6 +20,23 @@ import config
 # Global thread pool for PDF processing
 pdf_thread_pool = ThreadPoolExecutor(max_workers=2)  # Adjust based on your needs
 
+# PyMuPDF isn't thread-safe, so page rendering (moved off the event loop) runs one page at a time
+_fitz_lock = threading.Lock()
+
+def render_page_image(pdf_document, page_num: int) -> tuple[str, str]:
+    """Renders one page at 300 dpi and encodes it for the Vision API (blocking; run in a worker thread)."""
+    with _fitz_lock:
+        # Convert page to image with higher resolution
+        pix = pdf_document[page_num].get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    # Encode image to base64 (PIL releases the GIL while compressing, so pages encode in parallel)
+    return encode_pil_image(img)
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and transient server errors from the Mistral API are worth retrying."""
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (isinstance(status_code, int) and status_code >= 500) or "429" in str(error)
+
 def encode_pil_image(pil_image: Image.Image, format: str = "PNG") -> tuple[str, str]:
     """Encode PIL Image to Base64 string."""
     buffered = io.BytesIO()
@@ -37,8 +56,11 @@ def encode_pil_image(pil_image: Image.Image, format: str = "PNG") -> tuple[str,
     return base64.b64encode(img_byte).decode('utf-8'), save_format.lower()
 
 async def process_single_pdf(file_path: str, file_basename: str, client: Mistral, model_name: str, 
-                           text_splitter: RecursiveCharacterTextSplitter) -> List[Document]:
-    """Process a single PDF file and return its documents."""
+                           text_splitter: RecursiveCharacterTextSplitter, semaphore: asyncio.Semaphore) -> List[Document]:
+    """
+    Process a single PDF file and return its documents.
+    `semaphore` bounds the Vision API calls in flight and is shared by every PDF of the upload.
+    """
     all_docs = []
     total_pages_processed = 0
     pdf_document = None
@@ -67,77 +89,84 @@ Follow these formatting instructions:
 Output only the generated Markdown content.
 """
         
-        for page_num in range(total_pages):
-            logger.info(f"\n{'='*50}")
-            logger.info(f"Processing page {page_num + 1}/{total_pages} of {file_basename}")
-            logger.info(f"{'='*50}\n")
-            
-            try:
-                # Get the page
-                page = pdf_document[page_num]
-                
-                # Convert page to image with higher resolution
-                pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Encode image to base64
-                base64_image, image_format = encode_pil_image(img)
-                
-                # Prepare message for Mistral Vision
-                messages = [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": markdown_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": f"data:image/{image_format};base64,{base64_image}"
-                            }
-                        ]
-                    }
-                ]
+        # Pages are independent, so their Vision API calls run concurrently, bounded by the upload-wide
+        # semaphore; each page is rendered just before its call so at most PDF_PAGE_CONCURRENCY page images are held at once.
+        async def extract_page(page_num: int) -> Optional[str]:
+            async with semaphore:
+                logger.info(f"Processing page {page_num + 1}/{total_pages} of {file_basename}")
+                try:
+                    # Render and encode in a worker thread: a 300 dpi page takes long enough to stall the other calls
+                    base64_image, image_format = await asyncio.to_thread(render_page_image, pdf_document, page_num)
+                    
+                    # Prepare message for Mistral Vision
+                    messages = [
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": markdown_prompt},
+                                {
+                                    "type": "image_url",
+                                    "image_url": f"data:image/{image_format};base64,{base64_image}"
+                                }
+                            ]
+                        }
+                    ]
+                except Exception as e:
+                    logger.error(f"Error rendering page {page_num + 1} of {file_basename}: {e}")
+                    return None
+
+                # Call Mistral Vision API, backing off on rate limits / server errors instead of losing the page
+                for attempt in range(config.PDF_PAGE_MAX_RETRIES + 1):
+                    try:
+                        logger.info(f"Sending page {page_num + 1} of {file_basename} to Mistral Vision API...")
+                        chat_response = await client.chat.complete_async(
+                            model=model_name,
+                            messages=messages
+                        )
+                        
+                        # Get extracted text
+                        return chat_response.choices[0].message.content
+                    except Exception as e:
+                        if attempt < config.PDF_PAGE_MAX_RETRIES and _is_retryable(e):
+                            delay = min(30.0, 2 ** attempt) + random.uniform(0, 1) # Exponential backoff with jitter
+                            logger.warning(f"Mistral Vision call for page {page_num + 1} of {file_basename} failed ({e}); retrying in {delay:.1f}s.")
+                            await asyncio.sleep(delay)
+                            continue
+                        logger.error(f"Error processing page {page_num + 1} with Mistral Vision: {e}")
+                        return None
+
+        page_contents = await asyncio.gather(*(extract_page(page_num) for page_num in range(total_pages)))
+
+        # Chunk in page order so chunk metadata stays deterministic
+        for page_num, page_content in enumerate(page_contents):
+            if page_content:
+                # Log the extracted content
+                logger.info(f"\nExtracted Content (page {page_num + 1} of {file_basename}):")
+                logger.info("-" * 40)
+                logger.info(page_content)
+                logger.info("-" * 40)
                 
-                # Call Mistral Vision API
-                logger.info("Sending page to Mistral Vision API...")
-                chat_response = client.chat.complete(
-                    model=model_name,
-                    messages=messages
-                )
+                # Split the content into chunks
+                chunks = text_splitter.split_text(page_content)
+                logger.info(f"\nSplit content into {len(chunks)} chunks")
                 
-                # Get extracted text
-                page_content = chat_response.choices[0].message.content
+                # Create Document objects for each chunk
+                for j, chunk in enumerate(chunks):
+                    chunk_doc = Document(
+                        page_content=chunk,
+                        metadata={
+                            'source': file_basename,
+                            'page': page_num + 1,
+                            'chunk': j + 1,
+                            'total_chunks': len(chunks)
+                        }
+                    )
+                    all_docs.append(chunk_doc)
                 
-                if page_content:
-                    # Log the extracted content
-                    logger.info("\nExtracted Content:")
-                    logger.info("-" * 40)
-                    logger.info(page_content)
-                    logger.info("-" * 40)
-                    
-                    # Split the content into chunks
-                    chunks = text_splitter.split_text(page_content)
-                    logger.info(f"\nSplit content into {len(chunks)} chunks")
-                    
-                    # Create Document objects for each chunk
-                    for j, chunk in enumerate(chunks):
-                        chunk_doc = Document(
-                            page_content=chunk,
-                            metadata={
-                                'source': file_basename,
-                                'page': page_num + 1,
-                                'chunk': j + 1,
-                                'total_chunks': len(chunks)
-                            }
-                        )
-                        all_docs.append(chunk_doc)
-                    
-                    logger.success(f"Successfully processed page {page_num + 1} from {file_basename}")
-                    total_pages_processed += 1
-                else:
-                    logger.warning(f"No content extracted from page {page_num + 1} of {file_basename}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing page {page_num + 1} with Mistral Vision: {e}")
+                logger.success(f"Successfully processed page {page_num + 1} from {file_basename}")
+                total_pages_processed += 1
+            else:
+                logger.warning(f"No content extracted from page {page_num + 1} of {file_basename}")
                 
     except Exception as e:
         logger.error(f"Error processing {file_basename}: {e}", exc_info=True)
@@ -195,29 +224,19 @@ async def process_uploaded_pdfs(uploaded_files: List[BinaryIO], temp_dir: str =
             with open(file_path, "wb") as f:
                 f.write(uploaded_file.getvalue())
         
-        # Process PDFs in parallel using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=min(len(saved_file_paths), 4)) as executor:
-            # Create tasks for each PDF
-            loop = asyncio.get_event_loop()
-            tasks = []
-            for file_path in saved_file_paths:
-                file_basename = os.path.basename(file_path)
-                # Create a task that runs in the thread pool
-                task = loop.run_in_executor(
-                    executor,
-                    lambda p, b: asyncio.run(process_single_pdf(p, b, client, model_name, text_splitter)),
-                    file_path,
-                    file_basename
-                )
-                tasks.append(task)
-            
-            # Wait for all PDFs to be processed
-            results = await asyncio.gather(*tasks)
-            
-            # Combine all results
-            for docs in results:
-                if docs:  # Check if docs is not None
-                    all_docs.extend(docs)
+        # Process PDFs concurrently on this event loop (page calls inside each PDF are async too).
+        # The Mistral client's async HTTP pool is bound to one loop, so no per-thread asyncio.run here.
+        # One semaphore for the whole upload: PDF_PAGE_CONCURRENCY Vision calls in total, not per PDF.
+        semaphore = asyncio.Semaphore(max(1, config.PDF_PAGE_CONCURRENCY))
+        results = await asyncio.gather(*(
+            process_single_pdf(file_path, os.path.basename(file_path), client, model_name, text_splitter, semaphore)
+            for file_path in saved_file_paths
+        ))
+        
+        # Combine all results
+        for docs in results:
+            if docs:  # Check if docs is not None
+                all_docs.extend(docs)
             
     finally:
         # Clean up temporary files
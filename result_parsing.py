@@ -0,0 +1,99 @@
+# result_parsing.py
+# Turns raw extraction-chain outputs into a status + display value.
+# Kept out of app.py so the memo cache (and the Status identity) survives Streamlit reruns.
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import orjson
+
+class Status(Enum):
+    """Outcome of one attribute extraction, decided once while parsing."""
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    RATE_LIMIT = "rate_limit"
+    ERROR = "error"
+
+class ParsedResult(NamedTuple):
+    status: Status
+    value: str # Extracted value, or a short description of what went wrong
+    parse_error: Optional[Exception]
+
+@lru_cache(maxsize=256)
+def parse_result(raw_output: str, attribute_key: str) -> ParsedResult:
+    """
+    Parses one raw chain output ({"<attribute_key>": value} or {"error": msg}) into a status and display value.
+    Memoized on the raw string: cached outputs are re-rendered on every rerun and parsed by both the
+    card and the results table, so identical strings are only parsed once per process.
+    Args:
+        raw_output: The JSON string returned by the chain.
+        attribute_key: The attribute the output should contain.
+    Returns:
+        A ParsedResult; parse_error is set for rate limits and errors.
+    """
+    try:
+        parsed_json = orjson.loads(raw_output.strip())
+    except (TypeError, ValueError) as json_err: # orjson.JSONDecodeError is a ValueError
+        return ParsedResult(Status.ERROR, "Invalid JSON Response", json_err)
+    if not isinstance(parsed_json, dict):
+        return ParsedResult(Status.ERROR, "Unexpected JSON Type", TypeError(f"Expected dict, got {type(parsed_json)}"))
+    if attribute_key in parsed_json:
+        value = str(parsed_json[attribute_key])
+        is_not_found = "not found" in value.lower() or not value.strip()
+        return ParsedResult(Status.NOT_FOUND if is_not_found else Status.OK, value, None)
+    if "error" in parsed_json:
+        error_msg = str(parsed_json["error"])
+        if "rate limit" in error_msg.lower():
+            return ParsedResult(Status.RATE_LIMIT, "Rate Limit Hit", ValueError(f"Rate limit hit: {error_msg}"))
+        return ParsedResult(Status.ERROR, f"Error: {error_msg[:100]}", ValueError(error_msg))
+    return ParsedResult(Status.ERROR, "Unexpected JSON Format", ValueError(f"Unexpected JSON keys: {list(parsed_json.keys())}"))
+
+# Reasoning models wrap their chain-of-thought in <think>...</think>; group(1) is the answer after it
+_THINK_BLOCK_RE = re.compile(r"<think>.*?</think>(.*)", re.DOTALL)
+# First '{' to last '}' of the answer, which also drops any ```json fence around the object
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+# ```json fence (or a bare ```) around an answer that has no JSON object
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?|```\s*$")
+
+def clean_chain_response(response: str, attribute_key: str, truncated: bool = False) -> str:
+    """
+    Reduces a raw LLM response to the JSON string parse_result expects.
+    Args:
+        response: The model's full text output (reasoning included).
+        attribute_key: The attribute's real key (not a log label); a bare answer line is wrapped under it.
+        truncated: The model stopped at its output token cap (finish_reason == "length").
+    Returns:
+        The isolated JSON object, {attribute_key: last answer line} when the response has no JSON,
+        or an {"error": ...} payload (never cached, so Stage 2 or a rerun retries the attribute)
+        when the response was cut off.
+    """
+    if truncated:
+        # Whatever the cap left behind is half an answer at best (often the middle of the reasoning)
+        return orjson.dumps({"error": "Response cut off at the output token limit"}).decode()
+
+    # 1. Keep only what follows the <think> reasoning block
+    think_match = _THINK_BLOCK_RE.search(response)
+    if think_match:
+        cleaned_response = think_match.group(1)
+    elif "<think>" in response:
+        # Reasoning never finished (output cap or dropped stream): whatever comes last is not an answer
+        return orjson.dumps({"error": "Response ended inside the <think> reasoning block"}).decode()
+    else:
+        cleaned_response = response
+
+    # 2. Isolate the JSON object (markdown fences included) with one compiled search
+    json_match = _JSON_OBJECT_RE.search(cleaned_response)
+    if json_match:
+        try:
+            orjson.loads(json_match.group()) # Test if it's valid JSON
+            return json_match.group()
+        except orjson.JSONDecodeError:
+            # Fall back to the cleaned response (reported as invalid JSON downstream)
+            return cleaned_response.strip()
+
+    # 3. No JSON object: treat the last non-empty line as the answer (single scan from the end)
+    final_answer_line = _CODE_FENCE_RE.sub("", cleaned_response).rstrip().rsplit("\n", 1)[-1].strip()
+    if final_answer_line:
+        return orjson.dumps({attribute_key: final_answer_line}).decode()
+    return cleaned_response
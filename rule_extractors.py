@@ -0,0 +1,77 @@
+# rule_extractors.py
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from loguru import logger
+
+import config
+
+# Number words seen in datasheets ("single row", "dual-cavity", "two-way")
+_COUNT_WORDS = {
+    "single": "1", "one": "1", "double": "2", "dual": "2", "two": "2",
+    "triple": "3", "three": "3", "four": "4", "quad": "4",
+}
+_COUNT = r"(\d{1,3}|single|one|double|dual|two|triple|three|four|quad)"
+_POLYMER = r"(?:PA\d{0,3}|PBT|PPS|PPA|PET|PP|LCP|PC|POM|PEEK|PPSU)"
+
+def _count_value(match: re.Match) -> Optional[str]:
+    count = next(group for group in match.groups() if group) # Whichever alternative matched
+    value = _COUNT_WORDS.get(count.lower(), count)
+    return value if value.isdigit() and int(value) >= 1 else None
+
+def _temperature(group: int) -> Callable[[re.Match], Optional[str]]:
+    def value(match: re.Match) -> Optional[str]:
+        return str(int(match.group(group).replace("−", "-").replace(" ", "")))
+    return value
+
+class Rule(NamedTuple):
+    pattern: re.Pattern
+    value: Callable[[re.Match], Optional[str]] # Match -> extracted value (None = ignore this match)
+
+# "-40 °C to +125 °C", "-40°C ... 125°C", "−40 – 105 °C"
+_TEMPERATURE_RANGE = re.compile(
+    r"([-−]\s?\d{1,3})\s*°?\s*C?\s*(?:to|\.\.\.|…|–|—|/)\s*\+?\s*(\d{2,3})\s*°\s*C\b", re.I
+)
+
+# Compiled once at import. Rules are deliberately narrow: a rule only answers when its matches agree
+# (see extract_with_rules); anything ambiguous is left to the LLM.
+RULES: Dict[str, Rule] = {
+    "Material Filling": Rule(re.compile(rf"\b{_POLYMER}\s*[-+/ ]\s*(GF|GB|MF|T)\d{{0,2}}\b"), lambda m: m.group(1)),
+    # "12 cavities", "12-cavity", "12-way", or label first: "Number of cavities: 12". Bare "positions" / "way"
+    # are left out: datasheets use them for CPA/TPA and latch positions too.
+    "Number of Cavities": Rule(re.compile(
+        rf"\b(?:{_COUNT}\s*(?:[- ]?\s*cavit(?:y|ies)|-way)\b|cavit(?:y|ies)\s*[:=]\s*(\d{{1,3}})\b)", re.I
+    ), _count_value),
+    "Number of Rows": Rule(re.compile(rf"\b{_COUNT}\s*[- ]?\s*rows?\b", re.I), _count_value),
+    "Max. Working Temperature [°C]": Rule(_TEMPERATURE_RANGE, _temperature(2)),
+    "Min. Working Temperature [°C]": Rule(_TEMPERATURE_RANGE, _temperature(1)),
+}
+
+def extract_with_rules(text: str, attribute_keys: Iterable[str], min_matches: Optional[int] = None) -> Dict[str, str]:
+    """
+    Answers the attributes a precompiled regex rule can read straight from the text, before any LLM call.
+
+    Args:
+        text: The shared extraction input (scraped web table or prefetched PDF context).
+        attribute_keys: Attributes still to extract.
+        min_matches: Occurrences needed before a rule's answer is trusted (default config.RULE_MIN_MATCHES).
+
+    Returns:
+        A dict of attribute key -> value for the rule hits only; every other attribute
+        (no rule, too few matches, or conflicting values) is left for the LLM.
+    """
+    if min_matches is None:
+        min_matches = config.RULE_MIN_MATCHES
+    hits = {}
+    llm_fallback: List[str] = []
+    for attribute_key in attribute_keys:
+        rule = RULES.get(attribute_key)
+        if rule is None or not text:
+            continue
+        values = Counter(value for value in map(rule.value, rule.pattern.finditer(text)) if value is not None)
+        if len(values) == 1 and sum(values.values()) >= min_matches:
+            hits[attribute_key] = next(iter(values))
+        else:
+            llm_fallback.append(attribute_key)
+    logger.info("Rule extraction: rule_hit={} llm_fallback={}", hits, llm_fallback)
+    return hits
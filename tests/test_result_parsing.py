@@ -0,0 +1,32 @@
+# tests/test_result_parsing.py
+import orjson
+
+from result_parsing import Status, clean_chain_response, parse_result
+
+def test_bare_answer_line_is_wrapped_under_the_attribute_key():
+    raw = clean_chain_response("<think>The table says female.</think>\nFemale", "Gender")
+    assert orjson.loads(raw) == {"Gender": "Female"}
+    result = parse_result(raw, "Gender")
+    assert result.status is Status.OK
+    assert result.value == "Female"
+
+def test_fenced_answer_line_is_unwrapped():
+    raw = clean_chain_response("```\nGF, T\n```", "Material Filling")
+    assert parse_result(raw, "Material Filling") == (Status.OK, "GF, T", None)
+
+def test_json_object_is_isolated_after_reasoning():
+    raw = clean_chain_response('<think>{"draft": 1}</think>\n```json\n{"Colour": "black"}\n```', "Colour")
+    assert orjson.loads(raw) == {"Colour": "black"}
+
+def test_unclosed_think_block_is_an_error_not_an_answer():
+    raw = clean_chain_response("<think>Looking at the context\nthe value might be 12", "Number of Cavities")
+    assert "error" in orjson.loads(raw)
+    assert parse_result(raw, "Number of Cavities").status is Status.ERROR
+
+def test_output_cut_off_at_the_token_cap_is_an_uncached_error():
+    # finish_reason == "length": the reasoning ran into the cap, so the last line is mid-thought
+    raw = clean_chain_response("<think>Cavities are listed as", "Number of Cavities", truncated=True)
+    assert "error" in orjson.loads(raw)
+    # Even a closed think block is not trusted once the cap cut the response
+    raw = clean_chain_response("<think>ok</think>\nThe answer is", "Number of Cavities", truncated=True)
+    assert parse_result(raw, "Number of Cavities").status is Status.ERROR
@@ -0,0 +1,26 @@
+# tests/test_rule_extractors.py
+from rule_extractors import extract_with_rules
+
+CAVITIES = "Number of Cavities"
+
+def test_cavity_count_before_the_label():
+    text = "Housing, 12 cavities, natural. Sealed 12-cavity connector."
+    assert extract_with_rules(text, [CAVITIES], min_matches=2) == {CAVITIES: "12"}
+
+def test_cavity_count_after_the_label():
+    text = "Number of cavities: 12\nCavities = 12"
+    assert extract_with_rules(text, [CAVITIES], min_matches=2) == {CAVITIES: "12"}
+
+def test_cpa_and_tpa_positions_are_not_cavities():
+    # Two agreeing "2 positions" used to answer "2" without asking the LLM
+    text = "CPA: 2 positions\nTPA: 2 positions\nNumber of cavities: 12"
+    assert extract_with_rules(text, [CAVITIES], min_matches=2) == {}
+    assert extract_with_rules(text, [CAVITIES], min_matches=1) == {CAVITIES: "12"}
+
+def test_way_count_needs_the_hyphenated_form():
+    assert extract_with_rules("two-way connector, 2-way housing", [CAVITIES], min_matches=2) == {CAVITIES: "2"}
+    assert extract_with_rules("one way valve, one way latch", [CAVITIES], min_matches=2) == {}
+
+def test_conflicting_counts_are_left_to_the_llm():
+    text = "12 cavities ... 16 cavities ... 12-way"
+    assert extract_with_rules(text, [CAVITIES], min_matches=2) == {}
@@ -8,10 +8,9 @@ logger = logging.getLogger(__name__)
 def timing_decorator(func):
     """A simple decorator to measure the execution time of a function."""
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        duration = end_time - start_time
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
         logger.info(f"Function '{func.__name__}' executed in {duration:.4f} seconds.")
         return result
     return wrapper
@@ -1,23 +1,58 @@
 # vector_store.py
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from loguru import logger
+import hashlib
 import os
 import time
+import uuid
 
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.docstore.document import Document
 from langchain.vectorstores.base import VectorStoreRetriever
-from chromadb import Client as ChromaClient
+import chromadb
 
 import config # Import configuration
 
 # --- Embedding Function ---
+def resolve_embedding_device() -> str:
+    """Returns config.EMBEDDING_DEVICE, resolving 'auto' to cuda, then mps, then cpu."""
+    if config.EMBEDDING_DEVICE != "auto":
+        return config.EMBEDDING_DEVICE
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+    except Exception as e: # A broken CUDA install shouldn't stop the app; CPU still works
+        logger.warning(f"Could not probe for a GPU, using CPU for embeddings: {e}")
+    return "cpu"
+
 @logger.catch(reraise=True) # Automatically log exceptions
 def get_embedding_function():
     """Initializes and returns the HuggingFace embedding function."""
-    model_kwargs = {'device': config.EMBEDDING_DEVICE}
-    encode_kwargs = {'normalize_embeddings': config.NORMALIZE_EMBEDDINGS}
+    device = resolve_embedding_device()
+    model_kwargs = {'device': device}
+    encode_kwargs = {'normalize_embeddings': config.NORMALIZE_EMBEDDINGS, 'batch_size': config.EMBEDDING_BATCH_SIZE}
+    logger.info(f"Embedding model will run on '{device}'.")
+
+    # FP16 weights on CUDA: roughly twice the throughput at the same retrieval quality
+    if device == "cuda" and config.EMBEDDING_FP16 and config.EMBEDDING_BACKEND in ("", None, "torch"):
+        import torch
+        model_kwargs['model_kwargs'] = {'torch_dtype': torch.float16}
+
+    # Optional ONNX Runtime / OpenVINO backend (e.g. INT8-quantized model on CPU); same Embeddings interface
+    if config.EMBEDDING_BACKEND and config.EMBEDDING_BACKEND != "torch":
+        model_kwargs['backend'] = config.EMBEDDING_BACKEND
+        backend_model_kwargs = {}
+        if config.EMBEDDING_MODEL_FILE:
+            backend_model_kwargs['file_name'] = config.EMBEDDING_MODEL_FILE
+        if config.EMBEDDING_ONNX_PROVIDER:
+            backend_model_kwargs['provider'] = config.EMBEDDING_ONNX_PROVIDER
+        if backend_model_kwargs:
+            model_kwargs['model_kwargs'] = backend_model_kwargs
+        logger.info(f"Using '{config.EMBEDDING_BACKEND}' embedding backend with options: {backend_model_kwargs}")
 
     embeddings = HuggingFaceEmbeddings(
         model_name=config.EMBEDDING_MODEL_NAME,
@@ -30,31 +65,106 @@ def get_embedding_function():
 _chroma_client = None # Module-level client cache
 
 def get_chroma_client():
-    """Gets or creates the ChromaDB client based on config."""
+    """
+    Gets or creates the HTTP client for a Chroma server, if one is configured.
+    Returns:
+        A chromadb HttpClient when config.CHROMA_HOST is set, otherwise None
+        (the LangChain wrapper then opens the local persist directory itself).
+    """
     global _chroma_client
+    if not config.CHROMA_HOST:
+        return None
     if _chroma_client is None:
-        logger.info(f"Initializing Chroma client (Persistent: {config.CHROMA_SETTINGS.is_persistent})")
-        if config.CHROMA_SETTINGS.is_persistent:
-            logger.info(f"Chroma persistence directory: {config.CHROMA_PERSIST_DIRECTORY}")
-            # Ensure directory exists if persistent
-            if config.CHROMA_PERSIST_DIRECTORY and not os.path.exists(config.CHROMA_PERSIST_DIRECTORY):
-                 os.makedirs(config.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
-        _chroma_client = ChromaClient(config.CHROMA_SETTINGS)
+        logger.info(f"Connecting to Chroma server at {config.CHROMA_HOST}:{config.CHROMA_PORT}")
+        _chroma_client = chromadb.HttpClient(host=config.CHROMA_HOST, port=config.CHROMA_PORT)
         logger.success("Chroma client initialized.")
     return _chroma_client
 
+def persisted_store_exists() -> bool:
+    """True if there may be an index to load: a Chroma server is configured, or the persist directory exists."""
+    return bool(config.CHROMA_HOST) or bool(config.CHROMA_PERSIST_DIRECTORY and os.path.isdir(config.CHROMA_PERSIST_DIRECTORY))
+
+def as_extraction_retriever(vector_store: Chroma) -> VectorStoreRetriever:
+    """Wraps the vector store in the retriever used by the extraction chains (MMR by default, see config)."""
+    search_kwargs = {"k": config.RETRIEVER_K}
+    if config.RETRIEVER_SEARCH_TYPE == "mmr":
+        search_kwargs.update(fetch_k=config.RETRIEVER_FETCH_K, lambda_mult=config.RETRIEVER_LAMBDA_MULT)
+    return vector_store.as_retriever(search_type=config.RETRIEVER_SEARCH_TYPE, search_kwargs=search_kwargs)
+
+def collection_name_for(file_hashes: Iterable[str]) -> str:
+    """
+    Name of the collection indexing one set of PDFs. Every upload gets its own collection, so indexing
+    never touches the index other sessions' retrievers (or other app instances on a Chroma server) use.
+    The embedding model and chunking settings are part of the name: changing them means a fresh index.
+    Args:
+        file_hashes: SHA-256 of each uploaded PDF's bytes.
+    Returns:
+        A valid Chroma collection name ("<COLLECTION_NAME>-<digest>", at most 63 chars).
+    """
+    digest = hashlib.sha256(repr((
+        sorted(file_hashes), config.EMBEDDING_MODEL_NAME, config.CHUNK_SIZE, config.CHUNK_OVERLAP
+    )).encode()).hexdigest()[:16]
+    return f"{config.COLLECTION_NAME[:46]}-{digest}"
+
+def _hnsw_settings(metadata: Optional[dict]) -> dict:
+    return {key: value for key, value in (metadata or {}).items() if key.startswith("hnsw:")}
+
+def _open_collection_client():
+    """A chromadb client for collection-level operations (listing, metadata, deletion); None without any persistence."""
+    chroma_client = get_chroma_client()
+    if chroma_client is None and config.CHROMA_PERSIST_DIRECTORY:
+        chroma_client = chromadb.PersistentClient(path=config.CHROMA_PERSIST_DIRECTORY)
+    return chroma_client
+
+def _upload_collections(chroma_client) -> List[tuple]:
+    """(name, indexed_at) of every upload collection (see collection_name_for), newest first."""
+    collections = []
+    for collection in chroma_client.list_collections():
+        if isinstance(collection, str): # chromadb 0.6 lists names only; other versions include the metadata
+            name = collection
+            collection = _get_collection(chroma_client, name)
+        else:
+            name = collection.name
+        if collection is None or not name.startswith(f"{config.COLLECTION_NAME[:46]}-"):
+            continue
+        collections.append((name, (collection.metadata or {}).get("indexed_at", 0.0)))
+    return sorted(collections, key=lambda item: item[1], reverse=True)
+
+def _prune_collections(chroma_client, keep: str) -> None:
+    """Deletes all but the newest config.COLLECTIONS_KEPT upload collections (never `keep`, the one just built)."""
+    try:
+        names = [name for name, _ in _upload_collections(chroma_client) if name != keep]
+        for name in names[max(0, config.COLLECTIONS_KEPT - 1):]:
+            logger.info(f"Deleting old collection '{name}' (keeping the newest {config.COLLECTIONS_KEPT}).")
+            chroma_client.delete_collection(name)
+    except Exception as e: # Leftover collections only cost disk; the index just built is fine
+        logger.warning(f"Could not prune old Chroma collections: {e}")
+
+def _get_collection(chroma_client, collection_name: str):
+    """The named collection, or None if it doesn't exist."""
+    try:
+        return chroma_client.get_collection(collection_name)
+    except Exception: # ValueError / NotFoundError depending on the chromadb version
+        return None
+
 # --- Vector Store Setup ---
 @logger.catch(reraise=True)
 def setup_vector_store(
     documents: List[Document],
     embedding_function,
+    batch_size: Optional[int] = None,
+    collection_name: Optional[str] = None,
 ) -> Optional[VectorStoreRetriever]:
     """
-    Sets up the Chroma vector store. Creates a new one if it doesn't exist,
-    or potentially adds to an existing one (current logic replaces).
+    Sets up the Chroma vector store in its own collection (see collection_name_for); other collections,
+    including the ones other sessions are reading, are left alone. An existing collection of the same
+    name indexes the same PDFs and is reused as is, unless it is incomplete (a failed run) or its HNSW
+    settings differ from config.CHROMA_COLLECTION_METADATA (fixed at creation); then it is rebuilt.
     Args:
         documents: List of Langchain Document objects.
         embedding_function: The embedding function to use.
+        batch_size: Chunks per bulk upsert (defaults to config.VECTOR_STORE_BATCH_SIZE).
+        collection_name: Collection to build (defaults to config.COLLECTION_NAME).
     Returns:
         A VectorStoreRetriever object or None if setup fails.
     """
@@ -66,7 +176,7 @@ def setup_vector_store(
         return None
 
     persist_directory = config.CHROMA_PERSIST_DIRECTORY
-    collection_name = config.COLLECTION_NAME
+    collection_name = collection_name or config.COLLECTION_NAME
 
     logger.info(f"Setting up vector store. Persistence directory: '{persist_directory}', Collection: '{collection_name}'")
 
@@ -81,58 +191,123 @@ def setup_vector_store(
         logger.info(f"Creating/Updating vector store '{collection_name}' with {len(documents)} document chunks...")
 
         # *** Add persist_directory argument here ***
-        vector_store = Chroma.from_documents(
-            documents=documents,
-            embedding=embedding_function,
+        chroma_client = get_chroma_client()
+        if chroma_client is not None:
+            persist_directory = None # The server owns persistence
+        # An existing collection of this name indexes the same PDFs. Reuse it if it was fully built with the
+        # current HNSW settings (fixed at creation); otherwise rebuild this collection, and only this one.
+        collection_client = _open_collection_client()
+        existing = _get_collection(collection_client, collection_name) if collection_client is not None else None
+        if existing is not None:
+            existing_metadata = existing.metadata or {}
+            complete = existing.count() == existing_metadata.get("chunks")
+            if complete and _hnsw_settings(existing_metadata) == _hnsw_settings(config.CHROMA_COLLECTION_METADATA):
+                logger.info(f"Collection '{collection_name}' already indexes these PDFs; reusing it.")
+                return as_extraction_retriever(Chroma(
+                    client=chroma_client,
+                    embedding_function=embedding_function,
+                    collection_name=collection_name,
+                    persist_directory=persist_directory,
+                ))
+            logger.info(f"Rebuilding collection '{collection_name}' (incomplete or built with other HNSW settings: {existing_metadata}).")
+            collection_client.delete_collection(collection_name)
+
+        vector_store = Chroma(
+            client=chroma_client,
+            embedding_function=embedding_function,
             collection_name=collection_name,
-            persist_directory=persist_directory # <-- This is the crucial addition
+            persist_directory=persist_directory, # <-- This is the crucial addition
+            # HNSW tuning, plus the chunk count (a collection is only reused once it holds all of them)
+            # and the time, so a fresh session can load the latest upload
+            collection_metadata={**config.CHROMA_COLLECTION_METADATA, "chunks": len(documents), "indexed_at": time.time()},
         )
 
-        # Ensure persistence after creation/update
-        if persist_directory:
-            logger.info(f"Persisting vector store to directory: {persist_directory}")
-            vector_store.persist() # Explicitly call persist just in case
+        # Embed every chunk in a single call (the model batches internally), then bulk-insert
+        # the precomputed vectors in slices so Chroma never re-invokes the embedder.
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        ids = [str(uuid.uuid4()) for _ in documents]
+        embeddings = embedding_function.embed_documents(texts)
+        batch_size = max(1, batch_size or config.VECTOR_STORE_BATCH_SIZE)
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            vector_store._collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+            )
+        logger.info(f"Inserted {len(texts)} chunks in batches of {batch_size}.")
+
+        # Chroma >= 0.4 writes the HNSW segment and SQLite metadata as it goes; there is no
+        # separate snapshot/pickle step (persist() is a deprecated no-op), so nothing to flush here.
 
         logger.success(f"Vector store '{collection_name}' created/updated and persisted successfully.")
+        if collection_client is not None:
+            _prune_collections(collection_client, keep=collection_name)
         # Return the retriever
-        return vector_store.as_retriever(search_kwargs={"k": config.RETRIEVER_K})
+        return as_extraction_retriever(vector_store)
 
     except Exception as e:
         logger.error(f"Failed to create or populate Chroma vector store '{collection_name}': {e}", exc_info=True)
         return None
 
+def latest_collection_name() -> str:
+    """
+    The most recently indexed upload collection (by its "indexed_at" metadata), else config.COLLECTION_NAME.
+    """
+    try:
+        chroma_client = _open_collection_client()
+        if chroma_client is None:
+            return config.COLLECTION_NAME
+        collections = _upload_collections(chroma_client)
+        return collections[0][0] if collections else config.COLLECTION_NAME
+    except Exception as e:
+        logger.warning(f"Could not list Chroma collections, falling back to '{config.COLLECTION_NAME}': {e}")
+        return config.COLLECTION_NAME
+
 # --- Load Existing Vector Store ---
 @logger.catch(reraise=True)
 def load_existing_vector_store(embedding_function) -> Optional[VectorStoreRetriever]:
     """
-    Loads an existing Chroma vector store from the persistent directory.
+    Loads the most recently indexed collection from the persistent directory (or Chroma server).
     Args:
         embedding_function: The embedding function to use.
     Returns:
         A VectorStoreRetriever object if the store exists and loads, otherwise None.
     """
     persist_directory = config.CHROMA_PERSIST_DIRECTORY
-    collection_name = config.COLLECTION_NAME
 
-    if not persist_directory:
-        logger.warning("Persistence directory not configured. Cannot load existing store.")
-        return None
     if not embedding_function:
         logger.error("Embedding function is not available for load_existing_vector_store.")
         return None
-
-    if not os.path.exists(persist_directory):
-         logger.warning(f"Persistence directory '{persist_directory}' does not exist. Cannot load.")
-         return None
-
-    logger.info(f"Attempting to load existing vector store from: '{persist_directory}', Collection: '{collection_name}'")
+    collection_name = latest_collection_name()
 
     try:
-        vector_store = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=embedding_function,
-            collection_name=collection_name,
-        )
+        chroma_client = get_chroma_client()
+        if chroma_client is not None:
+            # Server mode: the index stays in the Chroma process; only check the collection exists
+            logger.info(f"Attempting to load existing vector store from Chroma server, Collection: '{collection_name}'")
+            chroma_client.get_collection(collection_name)
+            vector_store = Chroma(
+                client=chroma_client,
+                embedding_function=embedding_function,
+                collection_name=collection_name,
+            )
+        else:
+            if not persist_directory:
+                logger.warning("Persistence directory not configured. Cannot load existing store.")
+                return None
+            if not os.path.exists(persist_directory):
+                 logger.warning(f"Persistence directory '{persist_directory}' does not exist. Cannot load.")
+                 return None
+
+            logger.info(f"Attempting to load existing vector store from: '{persist_directory}', Collection: '{collection_name}'")
+            vector_store = Chroma(
+                persist_directory=persist_directory,
+                embedding_function=embedding_function,
+                collection_name=collection_name,
+            )
         # Simple check to see if it loaded something (e.g., count items)
         # Note: .count() might not exist directly, use a different check if needed
         # A simple successful initialization might be enough indication
@@ -143,12 +318,12 @@ def load_existing_vector_store(embedding_function) -> Optional[VectorStoreRetrie
         #      logger.warning(f"Loaded collection '{collection_name}', but could not verify item count.")
 
         logger.success(f"Successfully loaded vector store '{collection_name}'.")
-        return vector_store.as_retriever(search_kwargs={"k": config.RETRIEVER_K})
+        return as_extraction_retriever(vector_store)
 
     except Exception as e:
         # This exception block might catch cases where the collection *within* the directory doesn't exist
         # or other Chroma loading errors.
-        logger.warning(f"Failed to load existing vector store '{collection_name}' from '{persist_directory}': {e}", exc_info=False) # Log less verbosely maybe
+        logger.warning(f"Failed to load existing vector store '{collection_name}' from '{config.CHROMA_HOST or persist_directory}': {e}", exc_info=False) # Log less verbosely maybe
         # Log specific known issues like collection not found separately if possible
         if "does not exist" in str(e).lower(): # Basic check
              logger.warning(f"Persistent collection '{collection_name}' not found in directory '{persist_directory}'. Cannot load.")